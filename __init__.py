@@ -6,6 +6,10 @@ import os
 import btl_blender_exportgroups.ops as btlops
 import btl_blender_exportgroups.ui as btlui
 import btl_blender_exportgroups.data as btldata
+import btl_blender_exportgroups.index as btlindex
+import btl_blender_exportgroups.rules as btlrules
+import btl_blender_exportgroups.staging as btlstaging
+import btl_blender_exportgroups.watch as btlwatch
 
 
 bl_info = {
@@ -21,19 +25,36 @@ bl_info = {
 def register():
     bpy.utils.register_class(btldata.ExportGroupSettings)
     bpy.utils.register_class(btldata.GroupObject)
+    bpy.utils.register_class(btldata.ExportProfile)
     bpy.utils.register_class(btldata.ExportGroup)
+    bpy.utils.register_class(btldata.ExportOptions)
 
     bpy.types.Scene.alembic_export_groups = bpy.props.CollectionProperty(
         type=btldata.ExportGroup)
     bpy.types.Scene.alembic_export_index = bpy.props.IntProperty(
         name="Index for alembic export group",
         default=0)
+    bpy.types.Scene.alembic_export_options = bpy.props.PointerProperty(
+        type=btldata.ExportOptions)
+    bpy.types.Scene.alembic_export_profiles = bpy.props.CollectionProperty(
+        type=btldata.ExportProfile)
+    bpy.types.Scene.alembic_export_profile_index = bpy.props.IntProperty(
+        name="Index for alembic export settings profile",
+        default=0)
 
     bpy.utils.register_class(btlops.AddSelectedToExportGroupOperator)
     bpy.utils.register_class(btlops.AddSelectedToExportGroupOperatorNoQuery)
     bpy.utils.register_class(btlops.RemoveSelectedFromExportGroupOperator)
     bpy.utils.register_class(btlops.SelectExportGroupObjectsOperator)
     bpy.utils.register_class(btlops.SetSelectedGroupsRangeFromSceneOperator)
+    bpy.utils.register_class(btlops.EstimateExportCostsOperator)
+    bpy.utils.register_class(btlops.CreateExportProfileOperator)
+    bpy.utils.register_class(btlops.DeleteExportProfileOperator)
+    bpy.utils.register_class(btlops.AssignProfileToSelectedGroupsOperator)
+    bpy.utils.register_class(btlops.ApplySettingsToSelectedGroupsOperator)
+    bpy.utils.register_class(btlops.OverrideGroupSettingOperator)
+    bpy.utils.register_class(btlops.ExportGroupDefinitionsOperator)
+    bpy.utils.register_class(btlops.ImportGroupDefinitionsOperator)
     bpy.utils.register_class(btlops.CreateExportGroupOperator)
     bpy.utils.register_class(btlops.DeleteSelectedExportGroupsOperator)
     bpy.utils.register_class(btlops.ExportGroupsOperator)
@@ -41,17 +62,34 @@ def register():
     bpy.utils.register_class(btlui.ObjectExportGroupPanel)
     bpy.utils.register_class(btlui.SceneExportGroupPanel)
     bpy.utils.register_class(btlui.SceneExportGroupsPanel)
+    bpy.utils.register_class(btlui.SceneExportProfilesList)
+    bpy.utils.register_class(btlui.SceneExportProfilesPanel)
     bpy.types.VIEW3D_MT_object.append(btlui.menu_func)
+    btlindex.register()
+    btlrules.register()
+    btlwatch.register()
 
 
 def unregister():
+    btlindex.unregister()
+    btlrules.unregister()
+    btlwatch.unregister()
+    # let files exported before disabling the addon reach their paths
+    btlstaging.wait()
     del bpy.types.Scene.alembic_export_groups
     del bpy.types.Scene.alembic_export_index
+    del bpy.types.Scene.alembic_export_options
+    del bpy.types.Scene.alembic_export_profiles
+    del bpy.types.Scene.alembic_export_profile_index
     bpy.utils.unregister_class(btlui.ObjectExportGroupPanel)
     bpy.utils.unregister_class(btlui.SceneExportGroupPanel)
     bpy.utils.unregister_class(btlui.SceneExportGroupsPanel)
+    bpy.utils.unregister_class(btlui.SceneExportProfilesList)
+    bpy.utils.unregister_class(btlui.SceneExportProfilesPanel)
+    bpy.utils.unregister_class(btldata.ExportOptions)
     bpy.utils.unregister_class(btldata.ExportGroup)
     bpy.utils.unregister_class(btldata.GroupObject)
+    bpy.utils.unregister_class(btldata.ExportProfile)
     bpy.utils.unregister_class(btldata.ExportGroupSettings)
     bpy.utils.unregister_class(btlops.AddSelectedToExportGroupOperator)
     bpy.utils.unregister_class(btlops.AddSelectedToExportGroupOperatorNoQuery)
@@ -62,6 +100,14 @@ def unregister():
     bpy.utils.unregister_class(btlops.ExportGroupsOperator)
     bpy.utils.unregister_class(btlops.ExportSelectedGroupsOperator)
     bpy.utils.unregister_class(btlops.SetSelectedGroupsRangeFromSceneOperator)
+    bpy.utils.unregister_class(btlops.EstimateExportCostsOperator)
+    bpy.utils.unregister_class(btlops.CreateExportProfileOperator)
+    bpy.utils.unregister_class(btlops.DeleteExportProfileOperator)
+    bpy.utils.unregister_class(btlops.AssignProfileToSelectedGroupsOperator)
+    bpy.utils.unregister_class(btlops.ApplySettingsToSelectedGroupsOperator)
+    bpy.utils.unregister_class(btlops.OverrideGroupSettingOperator)
+    bpy.utils.unregister_class(btlops.ExportGroupDefinitionsOperator)
+    bpy.utils.unregister_class(btlops.ImportGroupDefinitionsOperator)
     bpy.types.VIEW3D_MT_object.remove(btlui.menu_func)
 
 
@@ -0,0 +1,47 @@
+""" Conversions between Blender data and the plain data of `core.py`. """
+import btl_blender_exportgroups.core as btlcore
+import btl_blender_exportgroups.data as btldata
+
+
+def group_model(export_group, values=None):
+    """ The group as a core.Group, with the names of all its objects as
+    members, and `values` or else its effective settings values.
+    """
+    if values is None:
+        values = btldata.group_settings_values(export_group)
+    return btlcore.Group(export_group.name,
+                         [o.name for o in btldata.group_objects(export_group)],
+                         values)
+
+
+def scene_models(scene):
+    return [group_model(g) for g in scene.alembic_export_groups]
+
+
+def name_index(scene):
+    """ A core.GroupIndex of the names of the scene's groups, without members. """
+    return btlcore.GroupIndex(btlcore.Group(g.name, [], None)
+                              for g in scene.alembic_export_groups)
+
+
+def member_index(scene):
+    """ A core.GroupIndex of the scene's groups, keyed by the pointers
+    of their explicit members.
+    """
+    return btlcore.GroupIndex(
+        btlcore.Group(g.name,
+                      [o.object.as_pointer() for o in g.objects if o.object is not None],
+                      None)
+        for g in scene.alembic_export_groups)
+
+
+def group_object_list(export_group):
+    """ The explicit members of the group, None for deleted objects. """
+    return [o.object for o in export_group.objects]
+
+
+def set_group_objects(export_group, objects):
+    """ Make `objects` the explicit members of the group, in order. """
+    export_group.objects.clear()
+    for obj in objects:
+        export_group.objects.add().object = obj
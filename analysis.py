@@ -0,0 +1,109 @@
+""" Tell static objects from animated ones over a frame range.
+
+An object counts as animated if anything that can change its transform
+or geometry between frames may do so: fcurves whose value varies in the
+range, drivers, constraints, deforming, simulation or geometry node
+modifiers, particle systems, animated shape keys or data, or an animated
+parent or object referenced by its modifiers or data, like a boolean
+operand or a curve's bevel object.
+The checks err on the side of "animated"; a static object exported with
+the full range costs time, an animated one exported as static is wrong.
+"""
+import btl_blender_exportgroups.snapshot as btlsnapshot
+
+# Modifiers whose result can change from frame to frame, even without
+# fcurves on the object itself
+animated_modifier_types = {
+    "ARMATURE", "CAST", "CLOTH", "COLLISION", "CURVE", "DISPLACE",
+    "DYNAMIC_PAINT", "EXPLODE", "FLUID", "FLUID_SIMULATION", "HOOK",
+    "LAPLACIANDEFORM", "LATTICE", "MESH_CACHE", "MESH_DEFORM",
+    "MESH_SEQUENCE_CACHE", "NODES", "OCEAN", "PARTICLE_INSTANCE", "PARTICLE_SYSTEM",
+    "SHRINKWRAP", "SIMPLE_DEFORM", "SMOKE", "SOFT_BODY", "SURFACE",
+    "SURFACE_DEFORM", "WARP", "WAVE"}
+
+# Values closer than this count as equal
+tolerance = 1e-6
+
+
+def fcurve_varies(fcurve, start, end):
+    """ True if the fcurve's value changes anywhere in start..end. """
+    if fcurve.mute:
+        return False
+    if len(fcurve.modifiers) > 0:
+        return True
+
+    points = fcurve.keyframe_points
+    if len(points) == 0:
+        return False
+    first = points[0].co[1]
+    if all(abs(p.co[1] - first) <= tolerance and
+           abs(p.handle_left[1] - first) <= tolerance and
+           abs(p.handle_right[1] - first) <= tolerance for p in points):
+        return False
+
+    # keys differ, but the range may only cover a constant part of the curve
+    low = high = fcurve.evaluate(start)
+    for frame in range(start + 1, end + 1):
+        value = fcurve.evaluate(frame)
+        low = min(low, value)
+        high = max(high, value)
+        if high - low > tolerance:
+            return True
+    return False
+
+
+def animation_varies(animation_data, start, end):
+    """ True if an ID's action or drivers may change it in start..end. """
+    if animation_data is None:
+        return False
+    if len(animation_data.drivers) > 0 or len(animation_data.nla_tracks) > 0:
+        return True
+    action = animation_data.action
+    return action is not None and \
+        any(fcurve_varies(f, start, end) for f in action.fcurves)
+
+
+def _is_animated(obj, start, end, known):
+    pointer = obj.as_pointer()
+    if pointer in known:
+        return known[pointer]
+    # parent loops are impossible, but keep a cycle from recursing forever
+    known[pointer] = True
+
+    animated = (
+        animation_varies(obj.animation_data, start, end) or
+        any(not c.mute for c in obj.constraints) or
+        any(m.type in animated_modifier_types and m.show_viewport for m in obj.modifiers) or
+        len(getattr(obj, "particle_systems", ())) > 0 or
+        (obj.parent is not None and _is_animated(obj.parent, start, end, known)) or
+        # boolean operands, array offsets, mirror objects, data transfer sources...
+        any(_is_animated(target, start, end, known)
+            for m in obj.modifiers if m.show_viewport
+            for target in btlsnapshot.object_pointers(m)))
+
+    data = obj.data
+    if not animated and data is not None:
+        animated = animation_varies(getattr(data, "animation_data", None), start, end)
+        shape_keys = getattr(data, "shape_keys", None)
+        if not animated and shape_keys is not None:
+            animated = animation_varies(shape_keys.animation_data, start, end)
+        if not animated:
+            # curve bevel and taper objects, text on a curve
+            animated = any(_is_animated(target, start, end, known)
+                           for target in btlsnapshot.object_pointers(data))
+
+    known[pointer] = animated
+    return animated
+
+
+def split_static(objects, start, end):
+    """ (static, animated) lists of `objects` over frames start..end. """
+    known = {}
+    static = []
+    animated = []
+    for obj in objects:
+        if _is_animated(obj, start, end, known):
+            animated.append(obj)
+        else:
+            static.append(obj)
+    return static, animated
@@ -0,0 +1,243 @@
+""" Export the groups of many .blend files, resuming after interruptions.
+
+    python btl_blender_exportgroups/batch.py --blender /opt/blender/blender \\
+        --checkpoint seq010.jsonl --report seq010.json shots/seq010
+
+Runs with any Python 3, outside Blender; it starts one Blender process
+per file to list its groups, and one per (file, group) to export it,
+through `cli.py`. Every finished export is appended to the checkpoint
+file, so running the same command again only exports what failed or
+never ran. A failed export does not stop the batch. Exits with status 1
+if any export failed.
+"""
+import argparse
+import concurrent.futures
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+CLI_EXPR = "import btl_blender_exportgroups.cli as cli; cli.main()"
+# Must match cli.GROUPS_MARKER; cli.py cannot be imported outside Blender
+GROUPS_MARKER = "EXPORTGROUPS_GROUPS "
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="exportgroups-batch",
+        description="Export the alembic export groups of many .blend files")
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        help=".blend files, or directories searched for them recursively")
+    parser.add_argument(
+        "--blender",
+        default="blender",
+        help="Blender executable (default: blender on the PATH)")
+    parser.add_argument(
+        "--checkpoint",
+        required=True,
+        help="JSON lines file recording finished exports; existing entries are skipped")
+    parser.add_argument(
+        "--report",
+        help="Write a JSON report of all exports in the checkpoint to this file")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of Blender processes running at the same time")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Worker processes of each Blender process (default: each file's export options)")
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="Seconds after which an export counts as failed")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Export groups that are unchanged since their last export")
+    return parser.parse_args(argv)
+
+
+def find_blendfiles(paths):
+    """ The .blend files in `paths`, sorted within each directory. """
+    blendfiles = []
+    for path in paths:
+        if not os.path.isdir(path):
+            blendfiles.append(os.path.abspath(path))
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            blendfiles.extend(os.path.abspath(os.path.join(root, f))
+                              for f in sorted(files) if f.endswith(".blend"))
+    return blendfiles
+
+
+def blender_command(blender, blendfile, cli_args):
+    # without --python-exit-code, Blender exits with 0 when the script raises
+    return [blender, "-b", blendfile,
+            "--python-exit-code", "1",
+            "--python-expr", CLI_EXPR,
+            "--"] + cli_args
+
+
+def run(command, timeout):
+    """ (return code, output lines) of a command; code None on timeout. """
+    try:
+        proc = subprocess.run(command,
+                              stdout=subprocess.PIPE,
+                              stderr=subprocess.STDOUT,
+                              universal_newlines=True,
+                              timeout=timeout)
+    except subprocess.TimeoutExpired as e:
+        output = e.output or ""
+        if isinstance(output, bytes):
+            output = output.decode(errors="replace")
+        return None, output.splitlines()
+    except OSError as e:
+        return 1, [str(e)]
+    return proc.returncode, proc.stdout.splitlines()
+
+
+def list_groups(args, blendfile):
+    """ Names of the file's export groups, or an error message. """
+    returncode, lines = run(blender_command(args.blender, blendfile, ["--list"]),
+                            args.timeout)
+    for line in reversed(lines):
+        if line.startswith(GROUPS_MARKER):
+            return json.loads(line[len(GROUPS_MARKER):]), None
+    return None, "Listing groups failed: {}".format("\n".join(lines[-5:]))
+
+
+def export_group(args, blendfile, group_name):
+    """ Export one group of a file in its own Blender process.
+    Returns a checkpoint entry.
+    """
+    started = time.time()
+    fd, report_path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        cli_args = ["--group", group_name, "--report", report_path]
+        if args.workers is not None:
+            cli_args += ["--workers", str(args.workers)]
+        if args.force:
+            cli_args.append("--force")
+        returncode, lines = run(blender_command(args.blender, blendfile, cli_args),
+                                args.timeout)
+        try:
+            with open(report_path) as f:
+                report = json.load(f)
+        except ValueError:
+            # empty or partial: Blender did not get to write the report
+            report = None
+    finally:
+        os.remove(report_path)
+
+    # a crash may still exit with 0; only a report saying so counts as done
+    ok = returncode == 0 and report is not None and report.get("ok") is True
+    entry = {"blendfile": blendfile,
+             "group": group_name,
+             "ok": ok,
+             "time": started,
+             "duration": time.time() - started}
+    if report is not None:
+        entry["results"] = report["results"]
+        entry["skipped"] = report["skipped"]
+        entry["errors"] = report["errors"]
+    if returncode is None:
+        entry["message"] = "Timed out"
+    elif not ok:
+        entry["message"] = "\n".join(lines[-5:])
+    return entry
+
+
+class Checkpoint:
+    """ Append-only JSON lines record of finished exports. """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.entries = []
+        self.lock = threading.Lock()
+        if os.path.exists(filepath):
+            with open(filepath) as f:
+                for line in f:
+                    try:
+                        self.entries.append(json.loads(line))
+                    except ValueError:
+                        # a line cut short by a crash
+                        pass
+
+    def done(self):
+        """ (blendfile, group) of the exports that succeeded. """
+        return set((e["blendfile"], e["group"]) for e in self.entries if e["ok"])
+
+    def add(self, entry):
+        with self.lock:
+            self.entries.append(entry)
+            with open(self.filepath, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def latest(self):
+        """ The last entry of every (blendfile, group). """
+        latest = {}
+        for entry in self.entries:
+            latest[(entry["blendfile"], entry["group"])] = entry
+        return list(latest.values())
+
+
+def write_report(filepath, checkpoint, listing_errors):
+    entries = checkpoint.latest()
+    report = {
+        "ok": len(listing_errors) == 0 and all(e["ok"] for e in entries),
+        "exported": sum(1 for e in entries if e["ok"]),
+        "failed": [e for e in entries if not e["ok"]],
+        "listing_errors": listing_errors,
+        "exports": entries
+    }
+    with open(filepath, "w") as f:
+        json.dump(report, f, indent=1)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    checkpoint = Checkpoint(args.checkpoint)
+    done = checkpoint.done()
+
+    units = []
+    listing_errors = []
+    for blendfile in find_blendfiles(args.paths):
+        groups, message = list_groups(args, blendfile)
+        if groups is None:
+            print("{}: {}".format(blendfile, message))
+            listing_errors.append({"blendfile": blendfile, "message": message})
+            continue
+        units.extend((blendfile, g) for g in groups if (blendfile, g) not in done)
+
+    print("Exporting {} groups, {} already done".format(len(units), len(done)))
+    failed = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        futures = [pool.submit(export_group, args, blendfile, group_name)
+                   for blendfile, group_name in units]
+        for i, future in enumerate(concurrent.futures.as_completed(futures)):
+            entry = future.result()
+            checkpoint.add(entry)
+            if not entry["ok"]:
+                failed += 1
+            print("[{}/{}] {} {}: {}".format(i + 1, len(units), entry["blendfile"],
+                                             entry["group"], "ok" if entry["ok"] else "FAILED"))
+
+    if args.report is not None:
+        write_report(args.report, checkpoint, listing_errors)
+    print("Exported {} groups, {} failed".format(len(units) - failed, failed))
+    sys.exit(0 if failed == 0 and len(listing_errors) == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
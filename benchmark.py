@@ -0,0 +1,185 @@
+""" Benchmark the addon's operators on generated scenes.
+
+    blender -b --python benchmark.py -- --groups 20 --objects 50 \\
+        --frames 24 --density 16 --out bench.json
+
+A scene with G groups of M animated grid meshes (density x density
+vertices each) over F frames is generated for every run, and every
+operator is timed on it. The results are written as JSON, so runs from
+different versions of the addon can be compared.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import bpy
+
+import btl_blender_exportgroups.index as btlindex
+import btl_blender_exportgroups.workers as btlworkers
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="exportgroups-benchmark")
+    parser.add_argument("--groups", type=int, default=10, help="Groups per scene")
+    parser.add_argument("--objects", type=int, default=20, help="Objects per group")
+    parser.add_argument("--frames", type=int, default=10, help="Frames in the range")
+    parser.add_argument("--density", type=int, default=8,
+                        help="Vertices along each side of the grid meshes")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Runs per operator; the fastest one counts")
+    parser.add_argument("--no-export", action="store_true",
+                        help="Skip the (slow) full export")
+    parser.add_argument("--out", help="Write the results to this JSON file")
+    return parser.parse_args(argv)
+
+
+def grid_mesh(name, density):
+    """ A flat grid of density x density vertices. """
+    verts = [(x, y, 0.0) for y in range(density) for x in range(density)]
+    faces = [(y * density + x,
+              y * density + x + 1,
+              (y + 1) * density + x + 1,
+              (y + 1) * density + x)
+             for y in range(density - 1)
+             for x in range(density - 1)]
+    mesh = bpy.data.meshes.new(name)
+    mesh.from_pydata(verts, [], faces)
+    mesh.update()
+    return mesh
+
+
+def generate_scene(args):
+    """ Fill the current (empty) scene and return the object names
+    of every group.
+    """
+    scene = bpy.context.scene
+    scene.frame_start = 1
+    scene.frame_end = args.frames
+
+    mesh = grid_mesh("bench_grid", max(2, args.density))
+    groups = []
+    for g in range(args.groups):
+        names = []
+        for m in range(args.objects):
+            obj = bpy.data.objects.new("bench_{}_{}".format(g, m), mesh)
+            scene.collection.objects.link(obj)
+            obj.location = (g * args.density, m * args.density, 0.0)
+            obj.keyframe_insert("location", frame=1)
+            obj.location.z = 1.0
+            obj.keyframe_insert("location", frame=args.frames)
+            names.append(obj.name)
+        groups.append(names)
+    return groups
+
+
+def select_only(names):
+    for obj in bpy.context.view_layer.objects:
+        obj.select_set(state=False)
+    for name in names:
+        bpy.data.objects[name].select_set(state=True)
+
+
+def timed(fn, repeat=1, setup=None):
+    """ Fastest wall time of `repeat` calls of fn, in seconds. """
+    best = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def group_name(g):
+    return "bench_group_{}".format(g)
+
+
+def run(args):
+    bpy.ops.wm.read_homefile(use_empty=True)
+    btlworkers.ensure_registered()
+    scene = bpy.context.scene
+    groups = generate_scene(args)
+    outdir = tempfile.mkdtemp(prefix="exportgroups_bench_")
+    timings = {}
+
+    def create_groups():
+        for g, names in enumerate(groups):
+            select_only(names)
+            bpy.ops.scene.create_export_group(group_name=group_name(g))
+
+    def clear_groups():
+        scene.alembic_export_groups.clear()
+        btlindex.invalidate(scene)
+
+    timings["create"] = timed(create_groups, args.repeat, setup=clear_groups)
+    for g, export_group in enumerate(scene.alembic_export_groups):
+        export_group.settings.filepath = os.path.join(outdir, group_name(g) + ".abc")
+
+    # add every object of the scene to the first group, then remove them
+    all_names = [name for names in groups for name in names]
+
+    def add_all():
+        bpy.ops.scene.add_selected_to_group_no_query(group_name=group_name(0))
+
+    def remove_all():
+        bpy.ops.scene.remove_selected_from_group(group_name=group_name(0))
+
+    select_only(all_names)
+    timings["add"] = timed(add_all, args.repeat, setup=remove_all)
+    timings["remove"] = timed(remove_all, args.repeat, setup=add_all)
+    remove_all()
+    select_only(groups[0])
+    add_all()
+
+    def select_groups():
+        for g in range(len(groups)):
+            bpy.ops.scene.select_export_group_objects(group_name=group_name(g))
+
+    timings["select"] = timed(select_groups, args.repeat)
+
+    def select_all_groups():
+        for export_group in scene.alembic_export_groups:
+            export_group.group_selected = True
+
+    timings["set_range"] = timed(
+        lambda: bpy.ops.scene.set_selected_groups_range(),
+        args.repeat,
+        setup=select_all_groups)
+
+    if not args.no_export:
+        timings["export"] = timed(lambda: bpy.ops.scene.export_groups(force=True))
+
+    group_count = len(scene.alembic_export_groups)
+    timings["delete"] = timed(lambda: bpy.ops.scene.delete_selected_export_groups(),
+                              setup=select_all_groups)
+
+    return {
+        "version": list(bpy.app.version),
+        "timestamp": time.time(),
+        "parameters": {
+            "groups": args.groups,
+            "objects": args.objects,
+            "frames": args.frames,
+            "density": args.density,
+            "repeat": args.repeat
+        },
+        "group_count": group_count,
+        "timings": timings
+    }
+
+
+def main(argv=None):
+    args = parse_args(btlworkers.script_args() if argv is None else argv)
+    results = run(args)
+    print(json.dumps(results, indent=1))
+    if args.out is not None:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
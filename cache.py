@@ -0,0 +1,217 @@
+""" Content-addressed export cache.
+
+Every exported file is recorded with a key that hashes everything the
+export depends on, in a small key file of its own in a directory next to
+it. A group whose key matches, and whose output still exists, need not be
+exported. One key file per output, replaced atomically, lets several
+Blender processes record files of the same directory at once.
+"""
+import array
+import hashlib
+import os
+import threading
+
+import btl_blender_exportgroups.data as btldata
+import btl_blender_exportgroups.snapshot as btlsnapshot
+
+KEYS_DIRNAME = ".exportgroups_cache"
+
+
+def _hash_floats(h, values):
+    h.update(array.array("d", values).tobytes())
+
+
+def _foreach(h, collection, attribute, size, typecode="f"):
+    values = array.array(typecode, [0]) * (len(collection) * size)
+    collection.foreach_get(attribute, values)
+    h.update(values.tobytes())
+
+
+def _hash_mesh(h, obj, depsgraph, values):
+    obj_eval = obj.evaluated_get(depsgraph)
+    try:
+        mesh = obj_eval.to_mesh()
+    except RuntimeError:
+        # objects without geometry, like empties or cameras
+        return
+    if mesh is None:
+        return
+
+    try:
+        _foreach(h, mesh.vertices, "co", 3)
+        _foreach(h, mesh.loops, "vertex_index", 1, "i")
+        _foreach(h, mesh.polygons, "loop_total", 1, "i")
+        # face sets are written per material
+        _foreach(h, mesh.polygons, "material_index", 1, "i")
+        h.update(repr([m.name if m is not None else "" for m in mesh.materials]).encode())
+
+        if values["uvs"]:
+            for uv_layer in mesh.uv_layers:
+                h.update(uv_layer.name.encode())
+                _foreach(h, uv_layer.data, "uv", 2)
+        if values["normals"]:
+            if hasattr(mesh, "calc_normals_split"):
+                # Blender before 4.1 computes loop normals on request
+                mesh.calc_normals_split()
+            _foreach(h, mesh.loops, "normal", 3)
+        if values["vcolors"]:
+            color_layers = getattr(mesh, "color_attributes", None)
+            if color_layers is None:
+                color_layers = mesh.vertex_colors
+            for layer in color_layers:
+                h.update(layer.name.encode())
+                _foreach(h, layer.data, "color", 4)
+    finally:
+        obj_eval.to_mesh_clear()
+
+
+def _property_value(value):
+    """ A hashable form of an RNA or ID property value. """
+    for method in ("to_dict", "to_list"):
+        if hasattr(value, method):
+            return getattr(value, method)()
+    if isinstance(value, set):
+        # enum flags
+        return sorted(value)
+    if hasattr(value, "name"):
+        return value.name
+    if hasattr(value, "__len__") and not isinstance(value, str):
+        return list(value)
+    return value
+
+
+def _hash_rna(h, struct):
+    """ Hash the plain properties of an RNA struct, like particle settings. """
+    for prop in struct.bl_rna.properties:
+        if prop.type in {"BOOLEAN", "INT", "FLOAT", "ENUM", "STRING"}:
+            h.update(repr((prop.identifier,
+                           _property_value(getattr(struct, prop.identifier)))).encode())
+
+
+def _hash_object(h, obj, values):
+    """ Hash what the exporter writes of an object besides its geometry:
+    visibility, particle systems and custom properties.
+    """
+    h.update(repr((obj.hide_render, obj.hide_viewport, obj.visible_get())).encode())
+    if values["export_hair"] or values["export_particles"]:
+        for particle_system in obj.particle_systems:
+            h.update(repr((particle_system.name, particle_system.seed)).encode())
+            _hash_rna(h, particle_system.settings)
+    if values["export_custom_properties"]:
+        for owner in (obj, obj.data):
+            if owner is not None:
+                h.update(repr(sorted((k, repr(_property_value(v)))
+                                     for k, v in owner.items())).encode())
+
+
+def _hash_action(h, action):
+    for fcurve in action.fcurves:
+        h.update("{}[{}]".format(fcurve.data_path, fcurve.array_index).encode())
+        keys = array.array("f", [0.0]) * (len(fcurve.keyframe_points) * 2)
+        fcurve.keyframe_points.foreach_get("co", keys)
+        h.update(keys.tobytes())
+
+
+def _hash_animation_data(h, anim):
+    """ Hash the action, NLA strips and drivers of an ID. """
+    if anim is None:
+        return
+    if anim.action is not None:
+        _hash_action(h, anim.action)
+    for track in anim.nla_tracks:
+        for strip in track.strips:
+            h.update(repr((track.name, track.mute, strip.name, strip.mute,
+                           strip.frame_start, strip.frame_end)).encode())
+            if strip.action is not None:
+                _hash_action(h, strip.action)
+    for fcurve in anim.drivers:
+        driver = fcurve.driver
+        h.update("{}[{}]{}".format(fcurve.data_path, fcurve.array_index,
+                                   driver.expression).encode())
+        for variable in driver.variables:
+            for target in variable.targets:
+                h.update(repr((variable.name,
+                               target.id.name if target.id is not None else "",
+                               target.data_path,
+                               target.transform_type)).encode())
+
+
+def _hash_animation(h, obj):
+    for anim in btlsnapshot.animation_datas(obj):
+        _hash_animation_data(h, anim)
+
+
+def group_key(export_group, context):
+    """ Hash the settings, members, transforms, evaluated geometry
+    and animation keys of a group.
+    Geometry and transforms are those of the group's start frame, so
+    scrubbing the timeline does not change the key. The animation of
+    everything that moves or deforms the members at other frames is
+    hashed too: the actions, NLA strips and drivers of the members, their
+    data and shape keys, and of their parents, modifier, constraint and
+    driver targets.
+    """
+    h = hashlib.sha1()
+    values = btldata.group_settings_values(export_group)
+    h.update(repr(sorted(values.items())).encode())
+
+    scene = context.scene
+    frame = (scene.frame_current, scene.frame_subframe)
+    if frame != (values["start"], 0.0):
+        scene.frame_set(values["start"])
+    try:
+        depsgraph = context.evaluated_depsgraph_get()
+        objects = btldata.group_objects(export_group)
+        for obj in sorted(objects, key=lambda o: o.name):
+            h.update(obj.name.encode())
+            _hash_floats(h, [v for row in obj.matrix_world for v in row])
+            _hash_mesh(h, obj, depsgraph, values)
+            _hash_object(h, obj, values)
+    finally:
+        if frame != (values["start"], 0.0):
+            scene.frame_set(frame[0], subframe=frame[1])
+
+    dependencies = btlsnapshot.object_dependencies(objects)
+    for obj in sorted(dependencies, key=lambda o: o.name):
+        h.update(obj.name.encode())
+        _hash_animation(h, obj)
+
+    return h.hexdigest()
+
+
+def unit_key(group_key, overrides):
+    """ Key of one output file of a group, exported with `overrides`. """
+    h = hashlib.sha1(group_key.encode())
+    h.update(repr(sorted(overrides.items())).encode())
+    return h.hexdigest()
+
+
+def _key_path(filepath):
+    return os.path.join(os.path.dirname(filepath), KEYS_DIRNAME,
+                        os.path.basename(filepath) + ".key")
+
+
+def _read_key(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def is_current(filepath, key):
+    """ True if `filepath` exists and was last exported with `key`. """
+    if not os.path.exists(filepath):
+        return False
+    return _read_key(_key_path(filepath)) == key
+
+
+def record(filepath, key):
+    """ Store the key `filepath` was exported with. """
+    path = _key_path(filepath)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # readers see either the previous key or the new one, never a partial file
+    temppath = "{}.{}.{}.tmp".format(path, os.getpid(), threading.get_ident())
+    with open(temppath, "w") as f:
+        f.write(key)
+    os.replace(temppath, path)
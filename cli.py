@@ -0,0 +1,159 @@
+""" Command line entry point for exporting groups without the UI.
+
+    blender -b shot.blend --python-exit-code 1 --python-expr \\
+        "import btl_blender_exportgroups.cli as cli; cli.main()" \\
+        -- --groups "char_*,props" --workers 8 --report report.json
+
+Exits with status 1 if any group could not be exported. With `--list`,
+prints the names of the file's groups instead of exporting them.
+"""
+import argparse
+import fnmatch
+import glob
+import json
+import os
+import sys
+import traceback
+
+import bpy
+
+import btl_blender_exportgroups.data as btldata
+import btl_blender_exportgroups.export as btlexport
+import btl_blender_exportgroups.serialize as btlserialize
+import btl_blender_exportgroups.workers as btlworkers
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="exportgroups",
+        description="Export alembic export groups of the open file")
+    parser.add_argument(
+        "--groups",
+        default="*",
+        help="Comma separated group names or glob patterns (default: all groups)")
+    parser.add_argument(
+        "--group",
+        action="append",
+        help="Export the group with exactly this name; can be repeated, replaces --groups")
+    parser.add_argument(
+        "--list",
+        action="store_true",
+        help="Print the names of the file's groups as JSON and exit")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: the scene's export options)")
+    parser.add_argument(
+        "--report",
+        help="Write a JSON report of the export to this file")
+    parser.add_argument(
+        "--filepath-root",
+        help="Export into this directory, keeping the groups' file names")
+    parser.add_argument("--start", type=int, help="Override the start frame")
+    parser.add_argument("--end", type=int, help="Override the end frame")
+    parser.add_argument(
+        "--definitions",
+        help="Sync the groups with this JSON file of group definitions before exporting")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Export groups that are unchanged since their last export")
+    return parser.parse_args(argv)
+
+
+GROUPS_MARKER = "EXPORTGROUPS_GROUPS "
+
+
+def select_groups(scene, patterns):
+    """ Groups matching any of the patterns, in scene order,
+    and the patterns that matched no group.
+    """
+    groups = [g for g in scene.alembic_export_groups
+              if any(fnmatch.fnmatchcase(g.name, p) for p in patterns)]
+    unmatched = [p for p in patterns
+                 if not any(fnmatch.fnmatchcase(g.name, p)
+                            for g in scene.alembic_export_groups)]
+    return groups, unmatched
+
+
+def settings_overrides(export_group, args):
+    """ Settings values given on the command line for one group. """
+    overrides = {}
+    if args.filepath_root is not None:
+        filename = os.path.basename(bpy.path.abspath(
+            btldata.group_settings_values(export_group)["filepath"]))
+        overrides["filepath"] = os.path.join(os.path.abspath(args.filepath_root), filename)
+    if args.start is not None:
+        overrides["start"] = args.start
+    if args.end is not None:
+        overrides["end"] = args.end
+    return overrides
+
+
+def write_report(filepath, report):
+    with open(filepath, "w") as f:
+        json.dump(report, f, indent=1)
+
+
+def run(args):
+    """ Export the groups selected by `args`, then exit. """
+    btlworkers.ensure_registered()
+
+    context = bpy.context
+    if args.definitions is not None:
+        stats = btlserialize.sync_scene(context.scene,
+                                        btlserialize.read_definitions(args.definitions))
+        print("Synced group definitions: {}".format(stats))
+
+    if args.list:
+        print(GROUPS_MARKER + json.dumps([g.name for g in context.scene.alembic_export_groups]))
+        sys.exit(0)
+
+    if args.group is not None:
+        # exact names, escaped so they match only themselves
+        patterns = [glob.escape(name) for name in args.group]
+    else:
+        patterns = [p.strip() for p in args.groups.split(",") if p.strip() != ""]
+    groups, unmatched = select_groups(context.scene, patterns)
+
+    if len(unmatched) > 0:
+        report = btlexport.ExportReport()
+        report.errors.extend("No export group matches {}".format(p) for p in unmatched)
+    else:
+        report = btlexport.export_groups(
+            context,
+            groups,
+            force=args.force,
+            overrides={g.name: settings_overrides(g, args) for g in groups},
+            workers=args.workers)
+
+    result = report.as_dict()
+    result["blendfile"] = bpy.data.filepath
+    result["groups"] = [g.name for g in groups]
+    if args.report is not None:
+        write_report(args.report, result)
+
+    for message in report.errors:
+        print(message)
+    for export_result in report.failed:
+        print("Exporting group {} failed: {}".format(export_result.group,
+                                                      export_result.message))
+    print("Exported {} files, skipped {} unchanged, {} failed".format(
+        len(report.results) - len(report.failed),
+        len(report.skipped),
+        len(report.failed)))
+
+    sys.exit(0 if report.ok else 1)
+
+
+def main(argv=None):
+    args = parse_args(btlworkers.script_args() if argv is None else argv)
+    try:
+        run(args)
+    except Exception as e:
+        # without this, Blender exits with 0 unless --python-exit-code is given;
+        # SystemExit is no Exception, so the exits of `run` pass through
+        traceback.print_exc()
+        print("Exporting groups failed: {}".format(e))
+        sys.exit(1)
@@ -0,0 +1,146 @@
+""" Export group logic on plain data, independent of Blender.
+
+Groups are `Group` tuples with opaque, hashable members (object names or
+pointers) and their effective settings values as a dict. The modules
+that work on Blender data convert to and from these, see `adapter.py`,
+so that the logic here can be tested and benchmarked without Blender,
+see `tests/`.
+"""
+import collections
+import os
+
+import btl_blender_exportgroups.shards as btlshards
+
+# A group: its name, its members, and its effective settings values
+Group = collections.namedtuple("Group", ["name", "members", "values"])
+
+
+def added_members(members, objects):
+    """ The objects that are not members yet, in order and without
+    duplicates. Linear in the number of members and objects.
+    """
+    found = set(members)
+    added = []
+    for obj in objects:
+        if obj not in found:
+            found.add(obj)
+            added.append(obj)
+    return added
+
+
+def kept_members(members, objects):
+    """ The members that are not among `objects`, in order. """
+    removed = set(objects)
+    return [m for m in members if m not in removed]
+
+
+class GroupIndex:
+    """ Name -> position of the first group with that name, and
+    member -> names of the groups containing it.
+    """
+
+    def __init__(self, groups):
+        self.names = {}
+        self.members = {}
+        for i, group in enumerate(groups):
+            self.names.setdefault(group.name, i)
+            for member in group.members:
+                self.members.setdefault(member, set()).add(group.name)
+
+    def position(self, name):
+        return self.names.get(name)
+
+    def groups_of(self, member):
+        return self.members.get(member, set())
+
+
+def operator_args(values, addon_settings):
+    """ The settings values the alembic exporter takes. """
+    return {k: v for k, v in values.items() if k not in addon_settings}
+
+
+def group_units(values):
+    """ Overrides for each file a group with settings `values` is
+    exported to; one per frame range shard. The filepath must be absolute.
+    """
+    filepath = values["filepath"]
+    if values["shards"] <= 1:
+        return [{"filepath": filepath}]
+
+    return [{"filepath": btlshards.shard_path(filepath, start, end),
+             "start": start,
+             "end": end}
+            for start, end in btlshards.shard_ranges(
+                    values["start"], values["end"], values["shards"])]
+
+
+def static_path(filepath):
+    """ Path of the single frame file with the static objects of `filepath`,
+    e.g. `set.static.abc`.
+    """
+    root, ext = os.path.splitext(filepath)
+    return "{}.static{}".format(root, ext)
+
+
+def split_units(values, units, static, animated):
+    """ Overrides exporting the `static` members to a single frame file,
+    and only the `animated` members with `units`. The members are picked
+    through the selection, so the split units export selected objects only.
+    """
+    filepath = values["filepath"]
+    if len(static) == 0 or values["start"] >= values["end"]:
+        return units
+    if len(animated) == 0:
+        # nothing moves, one frame of everything is enough
+        return [{"filepath": filepath, "start": values["start"], "end": values["start"]}]
+
+    static_unit = {"filepath": static_path(filepath),
+                   "start": values["start"],
+                   "end": values["start"],
+                   "objects": list(static),
+                   "selected": True}
+    return [dict(unit, objects=list(animated), selected=True)
+            for unit in units] + [static_unit]
+
+
+def longest_first(units, estimate):
+    """ `units` sorted by `estimate(unit)`, the largest first; with a pool
+    pulling from the front, no long export starts when the others are done.
+    """
+    return sorted(units, key=estimate, reverse=True)
+
+
+def check_values(name, values):
+    """ Problems of the settings values of group `name`. """
+    problems = []
+    if values["filepath"] == "":
+        problems.append("Filepath cannot be empty for group {}".format(name))
+    if values["start"] > values["end"]:
+        problems.append("Group {} starts at frame {}, after its end frame {}".format(
+            name, values["start"], values["end"]))
+    return problems
+
+
+def check_plan(groups, units):
+    """ Problems of exporting `groups`, where `units` maps group names to
+    the overrides of each file they export: broken settings values,
+    duplicate group names and files written by several groups.
+    """
+    problems = []
+    outputs = collections.defaultdict(list)
+    for group in groups:
+        problems.extend(check_values(group.name, group.values))
+        for unit_overrides in units.get(group.name, []):
+            filepath = unit_overrides["filepath"]
+            outputs[os.path.normcase(os.path.normpath(filepath))].append(group.name)
+
+    name_counts = collections.Counter(g.name for g in groups)
+    for name, count in name_counts.items():
+        if count > 1:
+            problems.append("{} groups are named {}".format(count, name))
+
+    for filepath, names in outputs.items():
+        if len(names) > 1:
+            problems.append("Groups {} all export to {}".format(
+                ", ".join(sorted(set(names))), filepath))
+    return problems
@@ -0,0 +1,124 @@
+""" Estimates of the time and size of group exports.
+
+The base estimate counts the elements the exporter writes per frame:
+vertices and faces (more with subdivision applied or triangulation),
+hair and particle points, and object transforms, each multiplied by its
+number of samples per frame. Each group keeps the ratio of its measured
+export time and size to the base estimate, so its estimates follow its
+actual exports; groups never exported use the median ratio of the scene.
+"""
+import statistics
+
+import btl_blender_exportgroups.data as btldata
+
+# Rough costs per element and sample, before calibration
+seconds_per_element = 2e-7
+seconds_per_transform = 2e-5
+seconds_per_frame = 5e-3
+bytes_per_element = 16
+bytes_per_transform = 128
+
+# Weight of the latest export when updating a group's ratios
+calibration_weight = 0.5
+
+
+def subdiv_factor(obj):
+    """ How many times more elements a subdivided object has. """
+    factor = 1
+    for modifier in obj.modifiers:
+        if modifier.type == "SUBSURF" and modifier.show_viewport:
+            factor *= 4 ** modifier.levels
+    return factor
+
+
+def particle_points(obj, values):
+    """ Number of hair and particle points the exporter writes for `obj`. """
+    points = 0
+    for particle_system in obj.particle_systems:
+        settings = particle_system.settings
+        count = settings.count
+        if settings.child_type != "NONE":
+            count *= max(1, settings.child_nbr)
+        if settings.type == "HAIR" and values["export_hair"]:
+            points += count * (2 ** settings.display_step + 1)
+        elif settings.type == "EMITTER" and values["export_particles"]:
+            points += count
+    return points
+
+
+def object_elements(obj, values):
+    """ Elements of `obj` written per geometry sample. """
+    elements = particle_points(obj, values)
+    if obj.type == "MESH":
+        vertices = len(obj.data.vertices)
+        faces = len(obj.data.polygons)
+        if values["apply_subdiv"]:
+            factor = subdiv_factor(obj)
+            vertices *= factor
+            faces *= factor
+        if values["triangulate"]:
+            # mostly quads, each split into two triangles
+            faces *= 2
+        elements += vertices + faces
+    return elements
+
+
+def frame_costs(export_group, values):
+    """ Uncalibrated (seconds, bytes) of exporting one frame of the group
+    with settings `values`.
+    """
+    elements = 0
+    transforms = 0
+    for obj in btldata.group_objects(export_group):
+        elements += object_elements(obj, values)
+        transforms += 1
+    elements *= values["gsamples"]
+    transforms *= values["xsamples"]
+    return (seconds_per_frame
+            + elements * seconds_per_element
+            + transforms * seconds_per_transform,
+            elements * bytes_per_element + transforms * bytes_per_transform)
+
+
+def frame_count(values):
+    return max(0, values["end"] - values["start"] + 1)
+
+
+def default_ratios(scene):
+    """ Median (time, size) ratios of the scene's calibrated groups. """
+    times = [g.time_ratio for g in scene.alembic_export_groups if g.time_ratio > 0]
+    sizes = [g.size_ratio for g in scene.alembic_export_groups if g.size_ratio > 0]
+    return (statistics.median(times) if len(times) > 0 else 1.0,
+            statistics.median(sizes) if len(sizes) > 0 else 1.0)
+
+
+def calibrate(export_group, base, defaults):
+    """ Turn an uncalibrated (seconds, bytes) into an estimate for the group. """
+    return (base[0] * (export_group.time_ratio or defaults[0]),
+            base[1] * (export_group.size_ratio or defaults[1]))
+
+
+def estimate(export_group, defaults=None):
+    """ Estimated (seconds, bytes) of exporting the group with its settings. """
+    if defaults is None:
+        defaults = default_ratios(export_group.id_data)
+    values = btldata.group_settings_values(export_group)
+    seconds, size = frame_costs(export_group, values)
+    frames = frame_count(values)
+    return calibrate(export_group, (seconds * frames, size * frames), defaults)
+
+
+def _update_ratio(previous, ratio):
+    if previous <= 0:
+        return ratio
+    return previous + calibration_weight * (ratio - previous)
+
+
+def record(export_group, base, duration, size):
+    """ Update the group's ratios with an export measured at `duration`
+    seconds and `size` bytes, estimated at the uncalibrated `base`.
+    """
+    if base[0] > 0 and duration > 0:
+        export_group.time_ratio = _update_ratio(export_group.time_ratio, duration / base[0])
+    if base[1] > 0 and size > 0:
+        export_group.size_ratio = _update_ratio(export_group.size_ratio, size / base[1])
@@ -1,5 +1,7 @@
 import bpy
 
+import btl_blender_exportgroups.rules as btlrules
+
 # These enums are literal copies of the ones defined in io_alembic.c
 enum_modifier_triangulate_quad_method_items = [
     ("BEAUTY", "Beauty", "Split the quads in nice triangles, slower method", 1),
@@ -11,6 +13,46 @@ enum_modifier_triangulate_ngon_method_items = [
     ("BEAUTY", "Beauty", "Arrange the new triangles evenly (slow)", 1),
     ("CLIP", "Clip", "Split the polygons with an ear clipping algorithm", 2)]
 
+# Settings used by the addon itself, which are not passed on to the exporter
+addon_settings = ["shards", "split_static"]
+
+
+def settings_values(settings):
+    """ All fields of a settings property group as a dict. """
+    return {k: getattr(settings, k)
+            for k in settings.__annotations__.keys()}
+
+
+def group_profile(export_group):
+    """ The settings profile the group refers to, or None. """
+    if export_group.profile == "":
+        return None
+    return export_group.id_data.alembic_export_profiles.get(export_group.profile)
+
+
+def group_settings_values(export_group):
+    """ The settings the group is exported with: the fields set on the
+    group itself, and its profile's values for the other fields.
+    """
+    values = settings_values(export_group.settings)
+    profile = group_profile(export_group)
+    if profile is not None:
+        for k, v in settings_values(profile.settings).items():
+            if not export_group.settings.is_property_set(k):
+                values[k] = v
+    return values
+
+
+def group_objects(export_group):
+    """ The objects exported with the group: the ones added to it,
+    followed by the ones its rule selects.
+    """
+    objects = [o.object for o in export_group.objects if o.object is not None]
+    if export_group.rule_type != "NONE":
+        found = set(objects)
+        objects.extend(o for o in btlrules.rule_objects(export_group) if o not in found)
+    return objects
+
 
 class ExportGroupSettings(bpy.types.PropertyGroup):
     """ Complete set of settings for exporting alembic.
@@ -128,8 +170,32 @@ class ExportGroupSettings(bpy.types.PropertyGroup):
         default=True)
     as_background_job: bpy.props.BoolProperty(
         name="Run as background job",
-        description="Enable this to run the export in the background, disable to block Blender while exporting. ",
+        description="No effect: exports always block their process, export jobs keep Blender responsive instead",
         default=True)
+    shards: bpy.props.IntProperty(
+        name="Frame range shards",
+        description="Split the frame range into this many chunks, exported to separate files",
+        default=1,
+        min=1,
+        max=256)
+    split_static: bpy.props.BoolProperty(
+        name="Split static objects",
+        description="Export objects that do not move or deform in the frame range to a separate single frame file",
+        default=False)
+
+
+settings_fields = tuple(ExportGroupSettings.__annotations__.keys())
+
+# Fields kept for older files, but overridden on every export and not drawn
+ignored_settings = ["as_background_job"]
+drawn_settings_fields = tuple(k for k in settings_fields if k not in ignored_settings)
+
+# Fields that can be applied to many groups at once; every group has
+# its own output file, so the filepath is left out
+bulk_settings_items = [
+    (k, k.replace("_", " ").capitalize(), "")
+    for k in drawn_settings_fields
+    if k != "filepath"]
 
 
 class GroupObject(bpy.types.PropertyGroup):
@@ -139,6 +205,15 @@ class GroupObject(bpy.types.PropertyGroup):
     object: bpy.props.PointerProperty(type=bpy.types.Object)
 
 
+class ExportProfile(bpy.types.PropertyGroup):
+    """ Named settings shared by the groups that refer to it.
+    Groups override single fields by setting them on their own settings.
+    """
+    settings: bpy.props.PointerProperty(
+        name="Settings",
+        type=ExportGroupSettings)
+
+
 class ExportGroup(bpy.types.PropertyGroup):
     """ The export group combines the list of objects,
     the export settings, and a couple of service properties.
@@ -155,3 +230,97 @@ class ExportGroup(bpy.types.PropertyGroup):
     settings: bpy.props.PointerProperty(
         name="Settings",
         type=ExportGroupSettings)
+    rule_type: bpy.props.EnumProperty(
+        name="Rule",
+        description="Export the objects selected by this rule, besides the ones added to the group",
+        items=btlrules.rule_type_items,
+        default="NONE")
+    rule_collection: bpy.props.PointerProperty(
+        name="Collection",
+        type=bpy.types.Collection)
+    rule_pattern: bpy.props.StringProperty(
+        name="Pattern",
+        description="Pattern or regular expression object names must match")
+    rule_object_type: bpy.props.EnumProperty(
+        name="Object type",
+        items=btlrules.object_type_items,
+        default="MESH")
+    profile: bpy.props.StringProperty(
+        name="Profile",
+        description="Settings profile providing the settings this group does not set itself")
+    objects_page: bpy.props.IntProperty(
+        name="Page",
+        description="Page of the object list shown in the panel",
+        default=0,
+        min=0)
+    objects_filter: bpy.props.StringProperty(
+        name="Filter",
+        description="Only list objects whose name contains this text")
+    last_export: bpy.props.FloatProperty(
+        name="Last export",
+        description="Time of the last successful export, in seconds since the epoch",
+        default=0.0)
+    last_duration: bpy.props.FloatProperty(
+        name="Last export duration",
+        description="Seconds the last successful export took, over all of the group's files",
+        default=0.0)
+    last_size: bpy.props.FloatProperty(
+        name="Last export size",
+        description="Size in bytes of the files written by the last successful export",
+        default=0.0)
+    estimated_time: bpy.props.FloatProperty(
+        name="Estimated export time",
+        description="Estimated seconds to export the group, as of the last estimate",
+        default=0.0)
+    estimated_size: bpy.props.FloatProperty(
+        name="Estimated export size",
+        description="Estimated size in bytes of the group's files, as of the last estimate",
+        default=0.0)
+    time_ratio: bpy.props.FloatProperty(
+        name="Time ratio",
+        description="Measured export time over the uncalibrated estimate; 0 until the group is exported",
+        default=0.0)
+    size_ratio: bpy.props.FloatProperty(
+        name="Size ratio",
+        description="Measured file size over the uncalibrated estimate; 0 until the group is exported",
+        default=0.0)
+
+
+class ExportOptions(bpy.types.PropertyGroup):
+    """ Scene-wide options that control how the groups are exported,
+    as opposed to the per-group alembic settings.
+    """
+    workers: bpy.props.IntProperty(
+        name="Worker processes",
+        description="Number of background Blender processes exporting groups in parallel; 0 exports in this Blender process",
+        default=0,
+        min=0,
+        max=64)
+    use_snapshots: bpy.props.BoolProperty(
+        name="Export from group snapshots",
+        description="Workers load a minimal file with only their group's objects and dependencies, instead of a copy of the whole file",
+        default=False)
+    telemetry_log: bpy.props.StringProperty(
+        name="Telemetry log",
+        description="Append timings, sizes and memory use of every exported file to this JSON lines file",
+        subtype="FILE_PATH")
+    profile: bpy.props.BoolProperty(
+        name="Profile exports",
+        description="Write a cProfile dump next to every exported file",
+        default=False)
+    staging_dir: bpy.props.StringProperty(
+        name="Staging directory",
+        description="Export to this local directory first, then move the files to their paths in the background; leave empty to export in place",
+        subtype="DIR_PATH")
+    watch: bpy.props.BoolProperty(
+        name="Watch mode",
+        description="Export groups again with worker processes, shortly after their objects are moved or edited",
+        default=False)
+    watch_delay: bpy.props.FloatProperty(
+        name="Watch delay",
+        description="Seconds without edits before changed groups are exported",
+        default=2.0,
+        min=0.1,
+        max=60.0,
+        subtype="TIME",
+        unit="TIME")
@@ -0,0 +1,376 @@
+""" Export groups to alembic, independently of any operator.
+
+The export operators, the command line entry point and the workers all
+export through `export_groups` and `do_export_group`.
+"""
+import collections
+import functools
+import os
+import time
+
+import bpy
+
+import btl_blender_exportgroups.analysis as btlanalysis
+import btl_blender_exportgroups.cache as btlcache
+import btl_blender_exportgroups.core as btlcore
+import btl_blender_exportgroups.costs as btlcosts
+import btl_blender_exportgroups.data as btldata
+import btl_blender_exportgroups.index as btlindex
+import btl_blender_exportgroups.preflight as btlpreflight
+import btl_blender_exportgroups.selection as btlselection
+import btl_blender_exportgroups.shards as btlshards
+import btl_blender_exportgroups.staging as btlstaging
+import btl_blender_exportgroups.telemetry as btltelemetry
+import btl_blender_exportgroups.workers as btlworkers
+
+
+# One file to export: the group's name, the settings values overriding
+# the group's own, the cache key of the file, and the uncalibrated
+# (seconds, bytes) estimate of its export
+ExportUnit = collections.namedtuple("ExportUnit", ["group", "overrides", "key", "cost"])
+
+
+def export_args(values):
+    """ Build the alembic exporter arguments from settings values.
+    The filepath is made absolute, so it stays valid from a saved copy.
+    """
+    # filter out args from property group
+    opargs = btlcore.operator_args(values, btldata.addon_settings)
+    opargs["filepath"] = bpy.path.abspath(opargs["filepath"])
+    return opargs
+
+
+def do_export_group(export_group, context, selection=None, **overrides):
+    """ Export a group; overrides replace values from its settings.
+    An `objects` override lists the names of the members to export,
+    instead of all of them.
+    When exporting several groups, pass a shared SelectionManager as
+    `selection`; otherwise the selection is restored after this export.
+    """
+    if selection is None:
+        with btlselection.SelectionManager(context) as selection:
+            return do_export_group(export_group, context, selection, **overrides)
+
+    names = overrides.pop("objects", None)
+    values = btldata.group_settings_values(export_group)
+    values.update(overrides)
+    opargs = export_args(values)
+
+    filedir = os.path.dirname(opargs["filepath"])
+    if not os.path.exists(filedir):
+        os.makedirs(filedir)
+
+    objects = btldata.group_objects(export_group)
+    if names is not None:
+        names = set(names)
+        objects = [o for o in objects if o.name in names]
+    selection.select(objects)
+
+    return bpy.ops.wm.alembic_export(context.copy(),
+                                     "EXEC_DEFAULT",
+                                     **opargs)
+
+
+def export_units(values):
+    """ Overrides for each file a group with settings `values` is
+    exported to; one per frame range shard.
+    """
+    return btlcore.group_units(dict(values, filepath=bpy.path.abspath(values["filepath"])))
+
+
+def split_static_units(export_group, values, units):
+    """ Split the unit overrides of a group with `split_static` set:
+    its static objects go to a single frame file, and only its animated
+    objects are exported over the frame range.
+    """
+    if values["start"] >= values["end"]:
+        return units
+    static, animated = btlanalysis.split_static(btldata.group_objects(export_group),
+                                                values["start"], values["end"])
+    return btlcore.split_units(dict(values, filepath=bpy.path.abspath(values["filepath"])),
+                               units,
+                               [o.name for o in static],
+                               [o.name for o in animated])
+
+
+class ExportReport:
+    """ Outcome of exporting a list of groups. """
+
+    def __init__(self):
+        # problems that stopped the export before it started
+        self.errors = []
+        # an ExportResult per exported file
+        self.results = []
+        # (group name, filepath) of files that were up to date
+        self.skipped = []
+        # group name -> (filepath, shard ranges, static file or None) of
+        # sharded groups, whose manifest is written once all shards are
+        self.manifests = {}
+
+    @property
+    def failed(self):
+        return [r for r in self.results if not r.ok]
+
+    @property
+    def ok(self):
+        return len(self.errors) == 0 and len(self.failed) == 0
+
+    def report(self, operator):
+        """ Forward errors and a summary to an operator's report. """
+        for message in self.errors:
+            operator.report({"ERROR"}, message)
+        for result in self.failed:
+            operator.report(
+                {"ERROR"},
+                "Exporting group {} failed: {}".format(result.group, result.message))
+        if len(self.skipped) > 0:
+            operator.report({"INFO"},
+                            "Skipped {} unchanged files".format(len(self.skipped)))
+
+        stats = [r.stats for r in self.results if r.stats is not None]
+        if len(stats) > 0:
+            slowest = max(stats, key=lambda s: s["wall_time"])
+            operator.report(
+                {"INFO"},
+                "Exported {} files in {:.1f}s, slowest {} in {:.1f}s".format(
+                    len(stats),
+                    sum(s["wall_time"] for s in stats),
+                    slowest["group"],
+                    slowest["wall_time"]))
+
+    def as_dict(self):
+        return {
+            "ok": self.ok,
+            "errors": self.errors,
+            "results": [r._asdict() for r in self.results],
+            "skipped": [{"group": g, "filepath": f} for g, f in self.skipped]
+        }
+
+
+def plan_export(context, groups, report, force=False, overrides=None):
+    """ List the files to export for the given groups, as ExportUnits,
+    the most expensive first. Files that are unchanged since their last
+    export are skipped, unless `force` is set. `overrides` maps group
+    names to settings values replacing the stored ones. Problems are added
+    to `report`.
+    """
+    if overrides is None:
+        overrides = {}
+
+    values = {}
+    group_units = {}
+    checked_units = {}
+    for export_group in groups:
+        group_values = btldata.group_settings_values(export_group)
+        group_values.update(overrides.get(export_group.name, {}))
+        values[export_group.name] = group_values
+        if group_values["filepath"] == "":
+            group_units[export_group.name] = []
+            checked_units[export_group.name] = []
+            continue
+
+        group_units[export_group.name] = export_units(group_values)
+        checked_units[export_group.name] = list(group_units[export_group.name])
+        if group_values["split_static"]:
+            # the split, made after the checks, may add a static file
+            checked_units[export_group.name].append({"filepath": btlcore.static_path(
+                bpy.path.abspath(group_values["filepath"]))})
+
+    # check every group before spending any time on the static analysis
+    # or the exports
+    report.errors.extend(btlpreflight.check(groups, values, checked_units,
+                                            context.view_layer))
+    staging_dir = btlstaging.staging_dir(context.scene)
+    if staging_dir != "" and not btlpreflight.writable(staging_dir):
+        report.errors.append("Staging directory {} is not writable".format(staging_dir))
+    if len(report.errors) > 0:
+        return []
+
+    for export_group in groups:
+        group_values = values[export_group.name]
+        units = group_units[export_group.name]
+        if group_values["split_static"] and len(units) > 0:
+            units = split_static_units(export_group, group_values, units)
+            if len(units) == 1:
+                # a single frame file, not shards
+                group_values["shards"] = 1
+        group_units[export_group.name] = [
+            dict(overrides.get(export_group.name, {}), **unit_overrides)
+            for unit_overrides in units]
+        if group_values["shards"] > 1:
+            filepath = bpy.path.abspath(group_values["filepath"])
+            static_filepath = btlcore.static_path(filepath)
+            report.manifests[export_group.name] = (
+                filepath,
+                btlshards.shard_ranges(group_values["start"], group_values["end"],
+                                       group_values["shards"]),
+                static_filepath if any(u["filepath"] == static_filepath for u in units)
+                else None)
+
+    units = []
+    estimates = {}
+    defaults = btlcosts.default_ratios(context.scene)
+    for export_group in groups:
+        group_key = btlcache.group_key(export_group, context)
+        frame_costs = btlcosts.frame_costs(export_group, values[export_group.name])
+        for unit_overrides in group_units[export_group.name]:
+            key = btlcache.unit_key(group_key, unit_overrides)
+            if not force and btlcache.is_current(unit_overrides["filepath"], key):
+                report.skipped.append((export_group.name, unit_overrides["filepath"]))
+                continue
+            frames = btlcosts.frame_count(dict(values[export_group.name], **unit_overrides))
+            cost = (frame_costs[0] * frames, frame_costs[1] * frames)
+            units.append(ExportUnit(export_group.name, unit_overrides, key, cost))
+            estimates[unit_overrides["filepath"]] = btlcosts.calibrate(
+                export_group, cost, defaults)[0]
+
+    return btlcore.longest_first(units, lambda unit: estimates[unit.overrides["filepath"]])
+
+
+def export_overrides(unit, staging_dir=""):
+    """ The overrides to export a unit with, writing to the staging
+    directory if one is given.
+    """
+    # exports block until done; workers read their file from a temp copy
+    overrides = dict(unit.overrides, as_background_job=False)
+    if staging_dir != "":
+        overrides["filepath"] = btlstaging.staged_path(staging_dir, unit.overrides["filepath"])
+    return overrides
+
+
+def export_unit(context, unit, selection, staging_dir=""):
+    """ Export a single unit in this process, blocking until it is written.
+    A failing export yields a failed result.
+    """
+    export_group = btlindex.find_group(context.scene, unit.group)
+    if export_group is None:
+        return btlworkers.ExportResult(unit.group, unit.overrides["filepath"],
+                                       False, "Export group not found")
+
+    overrides = export_overrides(unit, staging_dir)
+    print("Exporting group {} to {}".format(unit.group, overrides["filepath"]))
+    values = btldata.group_settings_values(export_group)
+    values.update(overrides)
+    try:
+        result, stats = btltelemetry.measure(
+            export_group,
+            values,
+            lambda: do_export_group(export_group, context, selection, **overrides),
+            profile=context.scene.alembic_export_options.profile)
+    except RuntimeError as e:
+        # raised by the exporter operator; the other units still export
+        return btlworkers.ExportResult(unit.group, unit.overrides["filepath"],
+                                       False, str(e))
+    return btlworkers.ExportResult(unit.group, overrides["filepath"],
+                                   "FINISHED" in result, "", stats)
+
+
+def worker_unit(unit, staging_dir=""):
+    """ (group name, overrides) to hand a unit to a worker process. """
+    return unit.group, export_overrides(unit, staging_dir)
+
+
+def finish_export(context, report, units, results, staging_dir=""):
+    """ Record the exported units in the cache, their telemetry, and their
+    groups' last export. `results` holds an ExportResult per unit, or None
+    for units that were not exported.
+    With the `staging_dir` the units were exported to, the exported files
+    are moved to their final paths in the background and only recorded
+    in the cache once moved.
+    Returns (index in `report.results`, future) for each file being moved.
+    """
+    moves = []
+    unfinished = set()
+    durations = collections.Counter()
+    sizes = collections.Counter()
+    stats_list = []
+    for unit, result in zip(units, results):
+        if result is None:
+            unfinished.add(unit.group)
+            continue
+
+        filepath = unit.overrides["filepath"]
+        # results hold the path the unit was exported to, maybe a staged one
+        staged = result.filepath
+        result = result._replace(filepath=filepath)
+        report.results.append(result)
+        if result.stats is not None:
+            result.stats["filepath"] = filepath
+            stats_list.append(result.stats)
+            durations[unit.group] += result.stats["wall_time"]
+            sizes[unit.group] += result.stats["size"] or 0
+        if not result.ok:
+            unfinished.add(unit.group)
+        elif staging_dir != "":
+            moves.append((len(report.results) - 1, btlstaging.publish_async(
+                staged,
+                filepath,
+                lambda filepath=filepath, key=unit.key: btlcache.record(filepath, key))))
+        else:
+            btlcache.record(filepath, unit.key)
+
+    # a manifest only lists shards that are all in place
+    for name, (filepath, ranges, static_filepath) in report.manifests.items():
+        if name in unfinished:
+            continue
+        write = functools.partial(btlshards.write_manifest,
+                                  filepath, name, ranges, static_filepath)
+        group_moves = [future for i, future in moves if report.results[i].group == name]
+        if len(group_moves) == 0:
+            write()
+        else:
+            btlstaging.when_published(group_moves, write)
+
+    telemetry_log = context.scene.alembic_export_options.telemetry_log
+    if telemetry_log != "":
+        btltelemetry.write_log(bpy.path.abspath(telemetry_log), stats_list)
+
+    now = time.time()
+    base_times = collections.Counter()
+    base_sizes = collections.Counter()
+    for unit in units:
+        base_times[unit.group] += unit.cost[0]
+        base_sizes[unit.group] += unit.cost[1]
+    for name in set(unit.group for unit in units) - unfinished:
+        export_group = btlindex.find_group(context.scene, name)
+        if export_group is not None:
+            export_group.last_export = now
+            export_group.last_duration = durations[name]
+            export_group.last_size = sizes[name]
+            btlcosts.record(export_group, (base_times[name], base_sizes[name]),
+                            durations[name], sizes[name])
+            export_group.estimated_time, export_group.estimated_size = \
+                btlcosts.estimate(export_group)
+    return moves
+
+
+def export_groups(context, groups, force=False, overrides=None, workers=None):
+    """ Export the given groups, in this process or with a worker pool,
+    and block until all are written. See `plan_export` for the arguments;
+    `workers` defaults to the scene's export options.
+    """
+    if workers is None:
+        workers = context.scene.alembic_export_options.workers
+
+    report = ExportReport()
+    units = plan_export(context, groups, report, force, overrides)
+    if len(report.errors) > 0:
+        return report
+
+    staging_dir = btlstaging.staging_dir(context.scene)
+    if workers == 0:
+        # block on each export, the selection changes for the next group
+        with btlselection.SelectionManager(context) as selection:
+            results = [export_unit(context, unit, selection, staging_dir)
+                       for unit in units]
+    else:
+        print("Exporting {} files with {} workers".format(len(units), workers))
+        results = btlworkers.export_parallel(
+            context, [worker_unit(unit, staging_dir) for unit in units], workers)
+
+    moves = finish_export(context, report, units, results, staging_dir)
+    for i, future in moves:
+        message = future.result()
+        if message is not None:
+            report.results[i] = report.results[i]._replace(ok=False, message=message)
+    return report
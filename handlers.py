@@ -0,0 +1,47 @@
+""" Invalidation of the addon's caches on renames, file loads, undo and redo. """
+import bpy
+from bpy.app.handlers import persistent
+
+
+class CacheInvalidation:
+    """ Calls `invalidate()` when the `name` of any `rename_type` changes,
+    after a file is loaded, and on undo and redo.
+    """
+
+    def __init__(self, rename_type, invalidate):
+        self.rename_type = rename_type
+        self.invalidate = invalidate
+        self.owner = object()
+
+        @persistent
+        def on_load_post(*args):
+            invalidate()
+            # subscriptions are cleared when a file is loaded
+            self.subscribe_renames()
+
+        @persistent
+        def on_undo_redo(*args):
+            invalidate()
+
+        self.on_load_post = on_load_post
+        self.on_undo_redo = on_undo_redo
+
+    def subscribe_renames(self):
+        bpy.msgbus.subscribe_rna(
+            key=(self.rename_type, "name"),
+            owner=self.owner,
+            args=(),
+            notify=self.invalidate)
+
+    def register(self):
+        self.subscribe_renames()
+        bpy.app.handlers.load_post.append(self.on_load_post)
+        bpy.app.handlers.undo_post.append(self.on_undo_redo)
+        bpy.app.handlers.redo_post.append(self.on_undo_redo)
+
+    def unregister(self):
+        bpy.msgbus.clear_by_owner(self.owner)
+        bpy.app.handlers.load_post.remove(self.on_load_post)
+        bpy.app.handlers.undo_post.remove(self.on_undo_redo)
+        bpy.app.handlers.redo_post.remove(self.on_undo_redo)
+        self.invalidate()
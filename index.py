@@ -0,0 +1,101 @@
+""" Lookup indexes over a scene's export groups.
+
+Group lookups by name and group memberships of an object are answered
+from dictionaries built on first use, instead of scanning
+`alembic_export_groups` on every call. The name index only walks the
+groups; the member index walks all their objects, so it is kept apart
+and built only for `groups_of`. Code that adds, removes or renames
+groups, or edits their members, calls `invalidate`; renames from the UI,
+undo and file loads invalidate the indexes through handlers.
+"""
+import btl_blender_exportgroups.adapter as btladapter
+import btl_blender_exportgroups.data as btldata
+import btl_blender_exportgroups.handlers as btlhandlers
+
+
+# Scene pointer -> core.GroupIndex of its group names only
+_names = {}
+# Scene pointer -> core.GroupIndex of its groups' explicit members
+_members = {}
+_generation = 0
+
+
+def _name_index(scene):
+    index = _names.get(scene.as_pointer())
+    if index is None:
+        index = btladapter.name_index(scene)
+        _names[scene.as_pointer()] = index
+    return index
+
+
+def _member_index(scene):
+    index = _members.get(scene.as_pointer())
+    if index is None:
+        index = btladapter.member_index(scene)
+        _members[scene.as_pointer()] = index
+    return index
+
+
+def invalidate(scene=None):
+    """ Drop the indexes of `scene`, or of all scenes. """
+    global _generation
+    _generation += 1
+    if scene is None:
+        _names.clear()
+        _members.clear()
+    else:
+        _names.pop(scene.as_pointer(), None)
+        _members.pop(scene.as_pointer(), None)
+
+
+def invalidate_members(scene):
+    """ Drop the member index of `scene` only, after editing the members
+    of existing groups.
+    """
+    global _generation
+    _generation += 1
+    _members.pop(scene.as_pointer(), None)
+
+
+def generation():
+    """ Counter bumped by every `invalidate`, to stamp results derived
+    from group memberships.
+    """
+    return _generation
+
+
+def _lookup(scene, group_name):
+    groups = scene.alembic_export_groups
+    i = _name_index(scene).position(group_name)
+    if i is not None and i < len(groups) and groups[i].name == group_name:
+        return groups[i]
+    return None
+
+
+def find_group(scene, group_name):
+    """ The first export group named `group_name`, or None. """
+    fresh = scene.as_pointer() not in _names
+    found_group = _lookup(scene, group_name)
+    if found_group is not None or fresh:
+        return found_group
+    # the index went stale without being invalidated, e.g. by a rename
+    # or an undo that added the group: rebuild it once
+    _names.pop(scene.as_pointer(), None)
+    _members.pop(scene.as_pointer(), None)
+    return _lookup(scene, group_name)
+
+
+def groups_of(scene, obj):
+    """ Names of the export groups that contain `obj`. """
+    return _member_index(scene).groups_of(obj.as_pointer())
+
+
+_invalidation = btlhandlers.CacheInvalidation(btldata.ExportGroup, invalidate)
+
+
+def register():
+    _invalidation.register()
+
+
+def unregister():
+    _invalidation.unregister()
@@ -0,0 +1,130 @@
+""" Export job queue, dispatched from a modal operator's timer.
+
+Blender stays responsive between exports, the panel shows the progress
+of the job, and the job can be cancelled between groups.
+"""
+import collections
+
+import btl_blender_exportgroups.export as btlexport
+import btl_blender_exportgroups.selection as btlselection
+import btl_blender_exportgroups.staging as btlstaging
+import btl_blender_exportgroups.workers as btlworkers
+
+QUEUED = "QUEUED"
+RUNNING = "RUNNING"
+DONE = "DONE"
+FAILED = "FAILED"
+CANCELLED = "CANCELLED"
+
+state_icons = {
+    QUEUED: "SORTTIME",
+    RUNNING: "PLAY",
+    DONE: "CHECKMARK",
+    FAILED: "ERROR",
+    CANCELLED: "CANCEL"
+}
+
+# A group's state is the first of these states among its units
+state_priority = [FAILED, RUNNING, QUEUED, CANCELLED, DONE]
+
+# The job in flight, if any; only one job runs at a time
+current_job = None
+
+
+class ExportJob:
+    """ Exports a list of ExportUnits one step at a time, either in this
+    process or with up to `workers` background processes.
+    """
+
+    def __init__(self, context, units, report, workers):
+        self.units = units
+        self.report = report
+        self.workers = workers
+        self.states = [QUEUED] * len(units)
+        self.results = [None] * len(units)
+        self.running = {}
+        self.selection = None
+        self.tempdir = None
+        self.blendfiles = {}
+        self.staging_dir = btlstaging.staging_dir(context.scene)
+        # (index in report.results, future) of the files being moved
+        self.moves = []
+        # the panel shows the failed moves of the latest job
+        btlstaging.clear_failures()
+        if workers == 0:
+            self.selection = btlselection.SelectionManager(context)
+        elif len(units) > 0:
+            self.tempdir, self.blendfiles = btlworkers.prepare_blendfiles(
+                context, [unit.group for unit in units])
+
+    @property
+    def finished(self):
+        return all(s not in (QUEUED, RUNNING) for s in self.states)
+
+    @property
+    def progress(self):
+        """ Number of units that are no longer queued or running. """
+        return sum(1 for s in self.states if s not in (QUEUED, RUNNING))
+
+    def group_states(self):
+        """ State of each group in the job, aggregated over its units. """
+        states = collections.OrderedDict()
+        for unit, state in zip(self.units, self.states):
+            previous = states.get(unit.group, DONE)
+            states[unit.group] = min(previous, state, key=state_priority.index)
+        return states
+
+    def _set_result(self, i, result):
+        self.results[i] = result
+        self.states[i] = DONE if result.ok else FAILED
+
+    def step(self, context):
+        """ Advance the job; called from the modal operator's timer. """
+        if self.workers == 0:
+            # mark the unit as running first, so the panel can show it
+            # before this process blocks on the export
+            if RUNNING in self.states:
+                i = self.states.index(RUNNING)
+                # the selection may have changed since the last step
+                self.selection.refresh()
+                self._set_result(i, btlexport.export_unit(context, self.units[i],
+                                                          self.selection, self.staging_dir))
+            elif QUEUED in self.states:
+                self.states[self.states.index(QUEUED)] = RUNNING
+            return
+
+        for i, worker in list(self.running.items()):
+            if worker.done():
+                self._set_result(i, worker.result())
+                del self.running[i]
+
+        while len(self.running) < self.workers and QUEUED in self.states:
+            i = self.states.index(QUEUED)
+            name, overrides = btlexport.worker_unit(self.units[i], self.staging_dir)
+            try:
+                self.running[i] = btlworkers.Worker(self.blendfiles[name], name, overrides)
+            except OSError as e:
+                self._set_result(i, btlworkers.ExportResult(
+                    name, overrides["filepath"], False, str(e)))
+                continue
+            self.states[i] = RUNNING
+
+    def cancel(self):
+        """ Drop the queued units and stop running workers. """
+        for i, worker in self.running.items():
+            worker.terminate()
+            self.states[i] = CANCELLED
+        self.running.clear()
+        self.states = [CANCELLED if s == QUEUED else s for s in self.states]
+
+    def finish(self, context):
+        """ Restore the selection, clean up and record what was exported.
+        Staged files keep moving to their final paths in the background,
+        see `moves`.
+        """
+        if self.selection is not None:
+            self.selection.restore()
+        if self.tempdir is not None:
+            btlworkers.remove_blendfiles(self.tempdir)
+        self.moves = btlexport.finish_export(context, self.report, self.units,
+                                             self.results, self.staging_dir)
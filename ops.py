@@ -1,46 +1,50 @@
-import os
 import bpy
+from bpy_extras.io_utils import ExportHelper, ImportHelper
 
+import btl_blender_exportgroups.adapter as btladapter
+import btl_blender_exportgroups.core as btlcore
+import btl_blender_exportgroups.costs as btlcosts
+import btl_blender_exportgroups.data as btldata
+import btl_blender_exportgroups.export as btlexport
+import btl_blender_exportgroups.index as btlindex
+import btl_blender_exportgroups.jobs as btljobs
+import btl_blender_exportgroups.serialize as btlserialize
 
-def add_selected_objects_to_group(group_name, context):
-    found_groups = [g for g in context.scene.alembic_export_groups
-                    if g.name == group_name]
 
-    # if group not found, create it
-    if len(found_groups) == 0:
-        new_group = context.scene.alembic_export_groups.add()
-        new_group.name = group_name
-        new_group.settings.start = context.scene.frame_start
-        new_group.settings.end = context.scene.frame_end
-        context.scene.alembic_export_index += 1
-        for obj in context.selected_objects:
-            obj_ref = new_group.objects.add()
-            obj_ref.object = obj
-    else:
-        found_objects = [o.object for o in found_groups[0].objects]
-        for obj in context.selected_objects:
-            if obj not in found_objects:
-                obj_ref = found_groups[0].objects.add()
-                obj_ref.object = obj
+def add_objects_to_group(export_group, objects):
+    """ Add the objects that are not in the group yet. """
+    for obj in btlcore.added_members(btladapter.group_object_list(export_group), objects):
+        obj_ref = export_group.objects.add()
+        obj_ref.object = obj
 
 
-def do_export_group(export_group, context):
-    filedir = os.path.dirname(export_group.settings.filepath)
-    if not os.path.exists(filedir):
-        os.makedirs(filedir)
+def remove_objects_from_group(export_group, objects):
+    """ Remove the given objects from the group.
+    The collection is rebuilt in a single pass rather than removing
+    one index at a time. Returns the number of removed objects.
+    """
+    kept_objects = btlcore.kept_members(btladapter.group_object_list(export_group), objects)
+    removed = len(export_group.objects) - len(kept_objects)
+    if removed > 0:
+        btladapter.set_group_objects(export_group, kept_objects)
+    return removed
 
-    for obj in bpy.data.objects:
-        obj.select_set(state=False)
 
-    for obj_ref in export_group.objects:
-        obj_ref.object.select_set(state=True)
+def add_selected_objects_to_group(group_name, context):
+    found_group = btlindex.find_group(context.scene, group_name)
 
-    # filter out args from property group
-    opargs = {k: getattr(export_group.settings, k)
-              for k in export_group.settings.__annotations__.keys()}
-    return bpy.ops.wm.alembic_export(context.copy(),
-                                     "EXEC_DEFAULT",
-                                     **opargs)
+    # if group not found, create it
+    if found_group is None:
+        found_group = context.scene.alembic_export_groups.add()
+        found_group.name = group_name
+        found_group.settings.start = context.scene.frame_start
+        found_group.settings.end = context.scene.frame_end
+        context.scene.alembic_export_index += 1
+        add_objects_to_group(found_group, context.selected_objects)
+        btlindex.invalidate(context.scene)
+    else:
+        add_objects_to_group(found_group, context.selected_objects)
+        btlindex.invalidate_members(context.scene)
 
 
 class AddSelectedToExportGroupOperator(bpy.types.Operator):
@@ -88,14 +92,11 @@ class RemoveSelectedFromExportGroupOperator(bpy.types.Operator):
     group_name: bpy.props.StringProperty(name="Group name")
 
     def execute(self, context):
-        found_groups = [g for g in context.scene.alembic_export_groups if g.name == self.group_name]
+        found_group = btlindex.find_group(context.scene, self.group_name)
 
-        if len(found_groups) > 0:
-            found_obj_idxs = [i for i, o in enumerate(found_groups[0].objects)
-                              if o.object in context.selected_objects]
-            found_obj_idxs.reverse()
-            for idx in found_obj_idxs:
-                found_groups[0].objects.remove(idx)
+        if found_group is not None:
+            remove_objects_from_group(found_group, context.selected_objects)
+            btlindex.invalidate_members(context.scene)
         else:
             return {"CANCELLED"}
 
@@ -116,17 +117,15 @@ If invoked, user will be queried for group name
         return context.window_manager.invoke_props_dialog(self)
 
     def execute(self, context):
-        found_groups = [g for g in context.scene.alembic_export_groups
-                        if g.name == self.group_name]
+        found_group = btlindex.find_group(context.scene, self.group_name)
 
-        if len(found_groups) == 0:
+        if found_group is None:
             new_group = context.scene.alembic_export_groups.add()
             new_group.name = self.group_name
             new_group.settings.start = context.scene.frame_start
             new_group.settings.end = context.scene.frame_end
-            for obj in context.selected_objects:
-                obj_ref = new_group.objects.add()
-                obj_ref.object = obj
+            add_objects_to_group(new_group, context.selected_objects)
+            btlindex.invalidate(context.scene)
 
         return {"FINISHED"}
 
@@ -139,14 +138,13 @@ class DeleteSelectedExportGroupsOperator(bpy.types.Operator):
     bl_label = "Delete selected export groups"
 
     def execute(self, context):
-        selected_groups = [(i, s.name)
-                     for i, s in enumerate(context.scene.alembic_export_groups)
-                     if s.group_selected]
-        idxs, names = zip(*selected_groups)
+        idxs = [i for i, s in enumerate(context.scene.alembic_export_groups)
+                if s.group_selected]
 
-        # now delete the groups
-        for group_idx in idxs:
+        # now delete the groups, last first so the indices stay valid
+        for group_idx in reversed(idxs):
             context.scene.alembic_export_groups.remove(group_idx)
+        btlindex.invalidate(context.scene)
 
         return {"FINISHED"}
 
@@ -160,78 +158,383 @@ class SelectExportGroupObjectsOperator(bpy.types.Operator):
     group_name: bpy.props.StringProperty(name="Group name")
 
     def execute(self, context):
-        found_groups = [g for g in context.scene.alembic_export_groups
-                        if g.name == self.group_name]
+        found_group = btlindex.find_group(context.scene, self.group_name)
 
-        if len(found_groups) == 0:
+        if found_group is None:
             return {"CANCELLED"}
 
         # first deselect current selection
         for obj in context.selected_objects:
             obj.select_set(state=False)
 
-        for obj_ref in found_groups[0].objects:
-            obj_ref.object.select_set(state=True)
+        for obj in btldata.group_objects(found_group):
+            obj.select_set(state=True)
 
         return {"FINISHED"}
 
 
-class ExportGroupsOperator(bpy.types.Operator):
-    """ Export all alembic groups operator """
-    bl_idname = "scene.export_groups"
-    bl_label = "Export all groups"
+def tag_redraw_views(context):
+    for area in context.screen.areas:
+        if area.type == "VIEW_3D":
+            area.tag_redraw()
+
+
+class QueuedExportOperator:
+    """ Base of the export operators.
+    Executing the operator exports its groups and blocks until done.
+    Invoking it, e.g. from the panel, queues the groups in an export job
+    that a timer advances, so Blender stays responsive; ESC cancels it.
+    """
+    finished_message = "Alembic groups exported"
+    # export only the groups ticked in the panel, instead of all groups
+    selected_only = False
+
+    def target_groups(self, context):
+        return [g for g in context.scene.alembic_export_groups
+                if g.group_selected or not self.selected_only]
 
     def execute(self, context):
         print("Running")
-        for export_group in context.scene.alembic_export_groups:
-            print("Exporting group {}".format(export_group.name))
-            if export_group.settings.filepath == "":
-                self.report(
-                    {"ERROR"},
-                    "Filepath cannot be empty for group {}".format(export_group.name))
-                return {"CANCELLED"}
+        report = btlexport.export_groups(
+            context,
+            self.target_groups(context),
+            force=self.force)
+        report.report(self)
+        if not report.ok:
+            return {"CANCELLED"}
+
+        self.report({"INFO"}, self.finished_message)
+        return {"FINISHED"}
 
-            do_export_group(export_group, context)
+    def invoke(self, context, event):
+        if btljobs.current_job is not None:
+            self.report({"ERROR"}, "An export is already running")
+            return {"CANCELLED"}
+
+        report = btlexport.ExportReport()
+        units = btlexport.plan_export(
+            context, self.target_groups(context), report, force=self.force)
+        if len(report.errors) > 0:
+            report.report(self)
+            return {"CANCELLED"}
 
-        self.report({"INFO"}, "All alembic groups exported")
+        btljobs.current_job = btljobs.ExportJob(
+            context, units, report, context.scene.alembic_export_options.workers)
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.1, window=context.window)
+        wm.progress_begin(0, max(1, len(units)))
+        wm.modal_handler_add(self)
+        return {"RUNNING_MODAL"}
+
+    def end_job(self, context, job):
+        """ Stop the timer and finish the job; the job is cleared even if
+        finishing it fails, or no export could start again.
+        """
+        context.window_manager.event_timer_remove(self._timer)
+        context.window_manager.progress_end()
+        try:
+            job.finish(context)
+        finally:
+            btljobs.current_job = None
+
+    def modal(self, context, event):
+        job = btljobs.current_job
+        if event.type not in ("ESC", "TIMER"):
+            return {"PASS_THROUGH"}
+
+        try:
+            if event.type == "ESC":
+                job.cancel()
+            else:
+                job.step(context)
+        except Exception as e:
+            # the job marks failed exports itself; this is anything else
+            self.report({"ERROR"}, "Export job failed: {}".format(e))
+            job.cancel()
+            self.end_job(context, job)
+            return {"CANCELLED"}
+
+        context.window_manager.progress_update(job.progress)
+        tag_redraw_views(context)
+        if not job.finished:
+            return {"RUNNING_MODAL"}
+
+        self.end_job(context, job)
+
+        job.report.report(self)
+        if btljobs.CANCELLED in job.states:
+            self.report({"WARNING"}, "Export cancelled")
+            return {"CANCELLED"}
+        if not job.report.ok:
+            return {"CANCELLED"}
+
+        moving = [future for _, future in job.moves if not future.done()]
+        failed = [future.result() for _, future in job.moves
+                  if future.done() and future.exception() is None
+                  and future.result() is not None]
+        for message in failed:
+            self.report({"ERROR"}, message)
+        if len(failed) > 0:
+            return {"CANCELLED"}
+        if len(moving) > 0:
+            # failures of these show in the panel
+            self.report({"INFO"}, "{}, moving {} files to their paths".format(
+                self.finished_message, len(moving)))
+            return {"FINISHED"}
+
+        self.report({"INFO"}, self.finished_message)
         return {"FINISHED"}
 
 
-class ExportSelectedGroupsOperator(bpy.types.Operator):
+class ExportGroupsOperator(QueuedExportOperator, bpy.types.Operator):
+    """ Export all alembic groups operator """
+    bl_idname = "scene.export_groups"
+    bl_label = "Export all groups"
+    finished_message = "All alembic groups exported"
+
+    force: bpy.props.BoolProperty(
+        name="Force",
+        description="Export all groups, including the ones unchanged since their last export",
+        default=False)
+
+
+class ExportSelectedGroupsOperator(QueuedExportOperator, bpy.types.Operator):
     """ Export the currently selected groups """
     bl_idname = "scene.export_selected_groups"
     bl_label = "Export selected groups"
+    finished_message = "All selected alembic groups exported"
+    selected_only = True
+
+    force: bpy.props.BoolProperty(
+        name="Force",
+        description="Export the selected groups, including the ones unchanged since their last export",
+        default=False)
+
+
+class SetSelectedGroupsRangeFromSceneOperator(bpy.types.Operator):
+    """ Set the frame range of each selected group from the scene """
+    bl_idname = "scene.set_selected_groups_range"
+    bl_label = "Set selected groups range from scene"
 
     def execute(self, context):
-        print("Running")
         for export_group in context.scene.alembic_export_groups:
             if not export_group.group_selected:
                 continue
 
-            print("Exporting group {}".format(export_group.name))
-            if export_group.settings.filepath == "":
-                self.report(
-                    {"ERROR"},
-                    "Filepath cannot be empty for group {}".format(export_group.name))
-                return {"CANCELLED"}
+            export_group.settings.start = context.scene.frame_start
+            export_group.settings.end = context.scene.frame_end
 
-            do_export_group(export_group, context)
+        return {"FINISHED"}
+
+
+class EstimateExportCostsOperator(bpy.types.Operator):
+    """ Estimate the export time and file size of every group """
+    bl_idname = "scene.estimate_export_costs"
+    bl_label = "Estimate export costs"
+
+    def execute(self, context):
+        groups = context.scene.alembic_export_groups
+        if len(groups) == 0:
+            return {"CANCELLED"}
 
-        self.report({"INFO"}, "All selected alembic groups exported")
+        defaults = btlcosts.default_ratios(context.scene)
+        for export_group in groups:
+            export_group.estimated_time, export_group.estimated_size = \
+                btlcosts.estimate(export_group, defaults)
+
+        costliest = max(groups, key=lambda g: g.estimated_time)
+        self.report(
+            {"INFO"},
+            "Estimated {:.0f}s and {:.1f} MB in total, most for group {} ({:.0f}s)".format(
+                sum(g.estimated_time for g in groups),
+                sum(g.estimated_size for g in groups) / 1e6,
+                costliest.name,
+                costliest.estimated_time))
         return {"FINISHED"}
 
 
-class SetSelectedGroupsRangeFromSceneOperator(bpy.types.Operator):
-    """ Set the frame range of each selected group from the scene """
-    bl_idname = "scene.set_selected_groups_range"
-    bl_label = "Set selected groups range from scene"
+def active_group(context):
+    groups = context.scene.alembic_export_groups
+    index = context.scene.alembic_export_index
+    return groups[index] if 0 <= index < len(groups) else None
+
+
+class CreateExportProfileOperator(bpy.types.Operator):
+    """ Create a settings profile from the settings of the active group """
+    bl_idname = "scene.create_export_profile"
+    bl_label = "Create settings profile"
+    bl_options = {"REGISTER", "UNDO"}
+
+    profile_name: bpy.props.StringProperty(name="Profile name")
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
 
     def execute(self, context):
+        profiles = context.scene.alembic_export_profiles
+        if self.profile_name == "" or self.profile_name in profiles:
+            self.report({"ERROR"}, "Profile names must be unique and not empty")
+            return {"CANCELLED"}
+
+        profile = profiles.add()
+        profile.name = self.profile_name
+        source = active_group(context)
+        if source is not None:
+            for k, v in btldata.group_settings_values(source).items():
+                setattr(profile.settings, k, v)
+        context.scene.alembic_export_profile_index = len(profiles) - 1
+        return {"FINISHED"}
+
+
+class DeleteExportProfileOperator(bpy.types.Operator):
+    """ Delete the active settings profile.
+    Groups that refer to it keep its values as their own settings.
+    """
+    bl_idname = "scene.delete_export_profile"
+    bl_label = "Delete settings profile"
+    bl_options = {"REGISTER", "UNDO"}
+
+    def execute(self, context):
+        profiles = context.scene.alembic_export_profiles
+        index = context.scene.alembic_export_profile_index
+        if not 0 <= index < len(profiles):
+            return {"CANCELLED"}
+
+        name = profiles[index].name
         for export_group in context.scene.alembic_export_groups:
-            if not export_group.group_selected:
+            if export_group.profile == name:
+                values = btldata.group_settings_values(export_group)
+                for k, v in values.items():
+                    setattr(export_group.settings, k, v)
+                export_group.profile = ""
+
+        profiles.remove(index)
+        context.scene.alembic_export_profile_index = min(index, len(profiles) - 1)
+        return {"FINISHED"}
+
+
+class AssignProfileToSelectedGroupsOperator(bpy.types.Operator):
+    """ Make the selected groups refer to a settings profile """
+    bl_idname = "scene.assign_profile_to_selected_groups"
+    bl_label = "Assign profile to selected groups"
+    bl_options = {"REGISTER", "UNDO"}
+
+    profile_name: bpy.props.StringProperty(
+        name="Profile",
+        description="Name of the profile; leave empty to detach the groups from their profile")
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def draw(self, context):
+        self.layout.prop_search(self, "profile_name",
+                                context.scene, "alembic_export_profiles")
+
+    def execute(self, context):
+        if self.profile_name != "" and \
+           self.profile_name not in context.scene.alembic_export_profiles:
+            self.report({"ERROR"}, "No profile named {}".format(self.profile_name))
+            return {"CANCELLED"}
+
+        for export_group in context.scene.alembic_export_groups:
+            if export_group.group_selected:
+                export_group.profile = self.profile_name
+        return {"FINISHED"}
+
+
+class ApplySettingsToSelectedGroupsOperator(bpy.types.Operator):
+    """ Copy settings of the active group to all selected groups """
+    bl_idname = "scene.apply_settings_to_selected_groups"
+    bl_label = "Apply settings to selected groups"
+    bl_options = {"REGISTER", "UNDO"}
+
+    fields: bpy.props.EnumProperty(
+        name="Settings",
+        description="Settings to copy from the active group",
+        items=btldata.bulk_settings_items,
+        options={"ENUM_FLAG"})
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        source = active_group(context)
+        if source is None:
+            return {"CANCELLED"}
+
+        # read the source once, then write every target in a single pass
+        values = btldata.group_settings_values(source)
+        changes = [(k, values[k]) for k in self.fields]
+        for export_group in context.scene.alembic_export_groups:
+            if not export_group.group_selected or export_group == source:
                 continue
+            settings = export_group.settings
+            for k, v in changes:
+                setattr(settings, k, v)
+        return {"FINISHED"}
 
-            export_group.settings.start = context.scene.frame_start
-            export_group.settings.end = context.scene.frame_end
 
+class OverrideGroupSettingOperator(bpy.types.Operator):
+    """ Override a profile setting in a group, or revert it to the profile """
+    bl_idname = "scene.override_group_setting"
+    bl_label = "Override profile setting"
+    bl_options = {"REGISTER", "UNDO"}
+
+    group_name: bpy.props.StringProperty(name="Group name")
+    field: bpy.props.StringProperty(name="Setting")
+    override: bpy.props.BoolProperty(name="Override", default=True)
+
+    def execute(self, context):
+        export_group = btlindex.find_group(context.scene, self.group_name)
+        if export_group is None:
+            return {"CANCELLED"}
+
+        if self.override:
+            value = btldata.group_settings_values(export_group)[self.field]
+            setattr(export_group.settings, self.field, value)
+        else:
+            export_group.settings.property_unset(self.field)
+        return {"FINISHED"}
+
+
+class ExportGroupDefinitionsOperator(bpy.types.Operator, ExportHelper):
+    """ Write the definitions of all export groups and profiles to JSON """
+    bl_idname = "scene.export_group_definitions"
+    bl_label = "Save group definitions"
+
+    filename_ext = ".json"
+    filter_glob: bpy.props.StringProperty(default="*.json", options={"HIDDEN"})
+
+    def execute(self, context):
+        btlserialize.write_definitions(self.filepath, context.scene)
+        return {"FINISHED"}
+
+
+class ImportGroupDefinitionsOperator(bpy.types.Operator, ImportHelper):
+    """ Create and update export groups and profiles from JSON definitions """
+    bl_idname = "scene.import_group_definitions"
+    bl_label = "Load group definitions"
+    bl_options = {"REGISTER", "UNDO"}
+
+    filename_ext = ".json"
+    filter_glob: bpy.props.StringProperty(default="*.json", options={"HIDDEN"})
+    remove_missing: bpy.props.BoolProperty(
+        name="Remove missing groups",
+        description="Delete groups that are not in the definitions",
+        default=False)
+
+    def execute(self, context):
+        try:
+            definitions = btlserialize.read_definitions(self.filepath)
+            stats = btlserialize.sync_scene(context.scene, definitions,
+                                            remove_missing=self.remove_missing)
+        except (OSError, KeyError, TypeError, ValueError) as e:
+            self.report({"ERROR"}, "Cannot load {}: {}".format(self.filepath, e))
+            return {"CANCELLED"}
+
+        if len(stats["missing_objects"]) > 0:
+            self.report({"WARNING"}, "Missing objects: {}".format(
+                ", ".join(stats["missing_objects"][:10])))
+        self.report({"INFO"}, "{} groups created, {} updated, {} unchanged, {} removed".format(
+            stats["created"], stats["updated"], stats["unchanged"], stats["removed"]))
         return {"FINISHED"}
@@ -0,0 +1,68 @@
+""" Checks run on all groups of an export before any of them is exported,
+so that a broken group fails the whole export in one pass, up front.
+"""
+import os
+
+import btl_blender_exportgroups.core as btlcore
+import btl_blender_exportgroups.data as btldata
+import btl_blender_exportgroups.rules as btlrules
+
+
+def writable(filepath):
+    """ True if `filepath` can be created or overwritten. """
+    if os.path.exists(filepath):
+        return os.access(filepath, os.W_OK)
+
+    # the nearest existing directory must let us create the rest
+    directory = os.path.dirname(filepath)
+    while directory != "" and not os.path.exists(directory):
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            break
+        directory = parent
+    return os.path.isdir(directory or ".") and os.access(directory or ".", os.W_OK)
+
+
+def check_group(export_group, values, view_layer):
+    """ Problems of a single group's Blender data; see `core.check_values`
+    for the checks of its settings `values`.
+    """
+    problems = []
+    name = export_group.name
+    if export_group.profile != "" and btldata.group_profile(export_group) is None:
+        problems.append("Group {} refers to the missing profile {}".format(
+            name, export_group.profile))
+
+    error = btlrules.rule_error(export_group)
+    if error is not None:
+        problems.append("The rule of group {} is broken: {}".format(name, error))
+
+    objects = btldata.group_objects(export_group)
+    if len(objects) == 0:
+        problems.append("Group {} has no objects".format(name))
+    missing = sum(1 for o in export_group.objects if o.object is None)
+    hidden = [o.name for o in objects if view_layer.objects.get(o.name) is None]
+    if missing > 0:
+        problems.append("Group {} refers to {} deleted objects".format(name, missing))
+    if len(hidden) > 0:
+        problems.append("Group {} has objects outside the view layer: {}".format(
+            name, ", ".join(hidden[:5]) + (", ..." if len(hidden) > 5 else "")))
+    return problems
+
+
+def check(groups, values, units, view_layer):
+    """ All problems of the given groups.
+    `values` maps group names to their settings values, and `units`
+    maps group names to the overrides of each file they export.
+    """
+    # the plan checks need no members; collecting them resolves every rule
+    problems = btlcore.check_plan(
+        [btlcore.Group(g.name, [], values[g.name]) for g in groups], units)
+    for export_group in groups:
+        problems.extend(check_group(export_group, values[export_group.name], view_layer))
+        for unit_overrides in units[export_group.name]:
+            filepath = unit_overrides["filepath"]
+            if not writable(filepath):
+                problems.append("Cannot write {} for group {}".format(
+                    filepath, export_group.name))
+    return problems
@@ -0,0 +1,144 @@
+""" Group members defined by a rule instead of an explicit list:
+the objects of a collection, objects whose name matches a glob or
+regular expression, or objects of a type.
+
+Rules are resolved lazily and cached per group. A cached result stays
+valid while the rule, the number of objects in the scene and the
+generation counter are unchanged; handlers bump the counter whenever
+collections change or objects are renamed.
+"""
+import fnmatch
+import re
+
+import bpy
+from bpy.app.handlers import persistent
+
+import btl_blender_exportgroups.handlers as btlhandlers
+
+rule_type_items = [
+    ("NONE", "None", "Only the objects added to the group", 0),
+    ("COLLECTION", "Collection", "All objects in a collection and its children", 1),
+    ("NAME_GLOB", "Name pattern", "Objects whose name matches a pattern like char_*", 2),
+    ("NAME_REGEX", "Name expression", "Objects whose whole name matches a regular expression", 3),
+    ("OBJECT_TYPE", "Object type", "All objects of a type", 4)]
+
+object_type_items = [
+    ("MESH", "Mesh", "", 0),
+    ("CURVE", "Curve", "", 1),
+    ("SURFACE", "Surface", "", 2),
+    ("META", "Metaball", "", 3),
+    ("FONT", "Text", "", 4),
+    ("EMPTY", "Empty", "", 5),
+    ("CAMERA", "Camera", "", 6),
+    ("ARMATURE", "Armature", "", 7)]
+
+_generation = 0
+_cache = {}
+
+
+def invalidate(*args):
+    """ Make every cached rule result stale. """
+    global _generation
+    _generation += 1
+    _cache.clear()
+
+
+def generation():
+    """ Counter bumped by every `invalidate`, also on object renames. """
+    return _generation
+
+
+def rule_error(export_group):
+    """ Why the group's rule cannot be resolved, or None. """
+    if export_group.rule_type == "NAME_REGEX":
+        try:
+            re.compile(export_group.rule_pattern)
+        except re.error as e:
+            return "invalid regular expression: {}".format(e)
+    if export_group.rule_type == "COLLECTION" and export_group.rule_collection is None:
+        return "no collection set"
+    return None
+
+
+def _resolve(export_group, scene):
+    rule_type = export_group.rule_type
+    if rule_type == "COLLECTION":
+        collection = export_group.rule_collection
+        return list(collection.all_objects) if collection is not None else []
+    if rule_type == "NAME_GLOB":
+        pattern = export_group.rule_pattern
+        return [o for o in scene.objects if fnmatch.fnmatchcase(o.name, pattern)]
+    if rule_type == "NAME_REGEX":
+        if rule_error(export_group) is not None:
+            return []
+        expression = re.compile(export_group.rule_pattern)
+        return [o for o in scene.objects if expression.fullmatch(o.name)]
+    if rule_type == "OBJECT_TYPE":
+        object_type = export_group.rule_object_type
+        return [o for o in scene.objects if o.type == object_type]
+    return []
+
+
+def _cache_entry(export_group):
+    """ [stamp, objects, pointer set or None] of the group's rule. """
+    scene = export_group.id_data
+    collection = export_group.rule_collection
+    stamp = (_generation,
+             len(scene.objects),
+             export_group.rule_type,
+             export_group.rule_pattern,
+             export_group.rule_object_type,
+             collection.as_pointer() if collection is not None else 0)
+    key = (scene.as_pointer(), export_group.name)
+    entry = _cache.get(key)
+    if entry is None or entry[0] != stamp:
+        entry = [stamp, _resolve(export_group, scene), None]
+        _cache[key] = entry
+    return entry
+
+
+def rule_objects(export_group):
+    """ The objects the group's rule selects, from the cache if possible. """
+    if export_group.rule_type == "NONE":
+        return []
+    return _cache_entry(export_group)[1]
+
+
+def rule_pointers(export_group):
+    """ Pointers of the objects the group's rule selects, as a set built
+    once per cached result, to test many objects for membership.
+    """
+    if export_group.rule_type == "NONE":
+        return frozenset()
+    entry = _cache_entry(export_group)
+    if entry[2] is None:
+        entry[2] = frozenset(o.as_pointer() for o in entry[1])
+    return entry[2]
+
+
+@persistent
+def _on_depsgraph_update(scene, depsgraph=None):
+    if depsgraph is None:
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+    if depsgraph.id_type_updated("COLLECTION"):
+        invalidate()
+        return
+    for update in depsgraph.updates:
+        # plain edits of objects do not change which objects a rule selects
+        if isinstance(update.id, bpy.types.Object) and \
+           not (update.is_updated_transform or update.is_updated_geometry):
+            invalidate()
+            return
+
+
+_invalidation = btlhandlers.CacheInvalidation(bpy.types.Object, invalidate)
+
+
+def register():
+    _invalidation.register()
+    bpy.app.handlers.depsgraph_update_post.append(_on_depsgraph_update)
+
+
+def unregister():
+    bpy.app.handlers.depsgraph_update_post.remove(_on_depsgraph_update)
+    _invalidation.unregister()
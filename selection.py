@@ -0,0 +1,50 @@
+class SelectionManager:
+    """ Snapshot of the selection and active object of a view layer.
+    `select` only changes the objects whose selection state differs from
+    the previous call, and leaving the `with` block restores the snapshot.
+    """
+
+    def __init__(self, context):
+        self.view_layer = context.view_layer
+        self.original = self._selected()
+        self.active = self.view_layer.objects.active
+        self.current = set(self.original)
+
+    def _selected(self):
+        # not context.selected_objects, timers have no screen context
+        return set(o for o in self.view_layer.objects if o.select_get())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.restore()
+        return False
+
+    def _set(self, objects, state):
+        for obj in objects:
+            try:
+                obj.select_set(state=state)
+            except (ReferenceError, RuntimeError):
+                # removed objects, or objects not in this view layer
+                pass
+
+    def refresh(self):
+        """ Re-read the selection, after others may have changed it
+        since the last `select`, e.g. between the steps of a job.
+        """
+        self.current = self._selected()
+
+    def select(self, objects):
+        """ Make `objects` the selection. """
+        target = set(o for o in objects if o is not None)
+        self._set(self.current - target, False)
+        self._set(target - self.current, True)
+        self.current = target
+
+    def restore(self):
+        self.select(self.original)
+        try:
+            self.view_layer.objects.active = self.active
+        except ReferenceError:
+            pass
@@ -0,0 +1,187 @@
+""" Export group definitions as JSON, and sync a scene with them.
+
+A definition holds a group's name, settings profile, member object names
+and the settings the group sets itself. Syncing compares the definitions
+with the scene and only writes what differs, without touching the
+selection.
+"""
+import json
+import math
+
+import bpy
+
+import btl_blender_exportgroups.data as btldata
+import btl_blender_exportgroups.index as btlindex
+
+
+def dump_settings(settings):
+    """ The fields that are set on a settings group. """
+    return {k: getattr(settings, k) for k in btldata.settings_fields
+            if settings.is_property_set(k)}
+
+
+def dump_rule(export_group):
+    collection = export_group.rule_collection
+    return {
+        "type": export_group.rule_type,
+        "collection": collection.name if collection is not None else "",
+        "pattern": export_group.rule_pattern,
+        "object_type": export_group.rule_object_type
+    }
+
+
+def sync_rule(export_group, rule):
+    """ Set the group's rule; returns True if anything changed. """
+    collection = bpy.data.collections.get(rule.get("collection", ""))
+    values = {
+        "rule_type": rule.get("type", "NONE"),
+        "rule_collection": collection,
+        "rule_pattern": rule.get("pattern", ""),
+        "rule_object_type": rule.get("object_type", "MESH")
+    }
+    changed = False
+    for k, v in values.items():
+        if getattr(export_group, k) != v:
+            setattr(export_group, k, v)
+            changed = True
+    return changed
+
+
+def dump_group(export_group):
+    return {
+        "name": export_group.name,
+        "profile": export_group.profile,
+        "objects": [o.object.name for o in export_group.objects
+                    if o.object is not None],
+        "rule": dump_rule(export_group),
+        "settings": dump_settings(export_group.settings)
+    }
+
+
+def dump_scene(scene):
+    """ Definitions of all profiles and groups of the scene. """
+    return {
+        "profiles": [{"name": p.name, "settings": dump_settings(p.settings)}
+                     for p in scene.alembic_export_profiles],
+        "groups": [dump_group(g) for g in scene.alembic_export_groups]
+    }
+
+
+def _same_value(a, b):
+    if isinstance(a, float) or isinstance(b, float):
+        # float properties are single precision
+        return math.isclose(a, b, rel_tol=1e-6)
+    return a == b
+
+
+def sync_settings(settings, values):
+    """ Set the given values and unset all other fields.
+    Returns True if anything changed.
+    """
+    unknown = set(values) - set(btldata.settings_fields)
+    if len(unknown) > 0:
+        raise ValueError("Unknown settings: {}".format(", ".join(sorted(unknown))))
+
+    changed = False
+    for k in btldata.settings_fields:
+        if k in values:
+            if not settings.is_property_set(k) or not _same_value(getattr(settings, k), values[k]):
+                setattr(settings, k, values[k])
+                changed = True
+        elif settings.is_property_set(k):
+            settings.property_unset(k)
+            changed = True
+    return changed
+
+
+def sync_objects(export_group, names, objects_by_name, missing):
+    """ Make the group's members the named objects, in order.
+    Names of objects that do not exist are added to `missing`.
+    Returns True if anything changed.
+    """
+    objects = []
+    for name in names:
+        obj = objects_by_name.get(name)
+        if obj is None:
+            missing.append(name)
+        else:
+            objects.append(obj)
+
+    current = [o.object for o in export_group.objects]
+    if current == objects:
+        return False
+
+    if current == objects[:len(current)]:
+        # only new objects at the end, append them
+        new_objects = objects[len(current):]
+    else:
+        export_group.objects.clear()
+        new_objects = objects
+    for obj in new_objects:
+        export_group.objects.add().object = obj
+    return True
+
+
+def sync_scene(scene, definitions, remove_missing=False):
+    """ Create, update and optionally remove profiles and groups so the scene
+    matches `definitions`, as written by `dump_scene`.
+    Returns a dict of counts, and the names of missing objects.
+    """
+    stats = {"created": 0, "updated": 0, "unchanged": 0, "removed": 0, "missing_objects": []}
+
+    profiles = scene.alembic_export_profiles
+    for definition in definitions.get("profiles", []):
+        profile = profiles.get(definition["name"])
+        if profile is None:
+            profile = profiles.add()
+            profile.name = definition["name"]
+        sync_settings(profile.settings, definition.get("settings", {}))
+
+    groups = scene.alembic_export_groups
+    positions = {}
+    for i, export_group in enumerate(groups):
+        positions.setdefault(export_group.name, i)
+
+    objects_by_name = {o.name: o for o in bpy.data.objects}
+    names = set()
+    for definition in definitions.get("groups", []):
+        name = definition["name"]
+        names.add(name)
+        created = name not in positions
+        if created:
+            groups.add().name = name
+            positions[name] = len(groups) - 1
+            stats["created"] += 1
+        # adding to the collection invalidates references to its items
+        export_group = groups[positions[name]]
+
+        changed = False
+        profile = definition.get("profile", "")
+        if export_group.profile != profile:
+            export_group.profile = profile
+            changed = True
+        changed |= sync_settings(export_group.settings, definition.get("settings", {}))
+        changed |= sync_rule(export_group, definition.get("rule", {}))
+        changed |= sync_objects(export_group, definition.get("objects", []),
+                                objects_by_name, stats["missing_objects"])
+        if not created:
+            stats["updated" if changed else "unchanged"] += 1
+
+    if remove_missing:
+        removed = [i for i, g in enumerate(groups) if g.name not in names]
+        for i in reversed(removed):
+            groups.remove(i)
+        stats["removed"] = len(removed)
+
+    btlindex.invalidate(scene)
+    return stats
+
+
+def write_definitions(filepath, scene):
+    with open(filepath, "w") as f:
+        json.dump(dump_scene(scene), f, indent=1)
+
+
+def read_definitions(filepath):
+    with open(filepath) as f:
+        return json.load(f)
@@ -0,0 +1,56 @@
+""" Split a group's frame range into chunks exported to separate files.
+
+Chunks cover consecutive, non-overlapping frame ranges. A manifest
+written next to them describes in which order they join up.
+"""
+import json
+import os
+
+
+def shard_ranges(start, end, count):
+    """ Split the inclusive range start..end into at most `count`
+    consecutive ranges of (nearly) equal length.
+    """
+    frames = end - start + 1
+    count = max(1, min(count, frames))
+    if frames <= 0:
+        return [(start, end)]
+
+    ranges = []
+    first = start
+    for i in range(count):
+        length = frames // count + (1 if i < frames % count else 0)
+        ranges.append((first, first + length - 1))
+        first += length
+    return ranges
+
+
+def shard_path(filepath, start, end):
+    """ Path of the chunk covering start..end, e.g. `shot.0001-0100.abc`. """
+    root, ext = os.path.splitext(filepath)
+    return "{}.{:04d}-{:04d}{}".format(root, start, end, ext)
+
+
+def manifest_path(filepath):
+    root, _ = os.path.splitext(filepath)
+    return root + ".shards.json"
+
+
+def write_manifest(filepath, group_name, ranges, static_filepath=None):
+    """ Describe the chunks of `filepath` so they can be joined again,
+    together with the single frame file of its static objects, if any.
+    """
+    manifest = {
+        "group": group_name,
+        "start": ranges[0][0],
+        "end": ranges[-1][1],
+        "shards": [{"filepath": os.path.basename(shard_path(filepath, s, e)),
+                    "start": s,
+                    "end": e}
+                   for s, e in ranges]
+    }
+    if static_filepath is not None:
+        manifest["static"] = os.path.basename(static_filepath)
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with open(manifest_path(filepath), "w") as f:
+        json.dump(manifest, f, indent=1)
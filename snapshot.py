@@ -0,0 +1,104 @@
+""" Minimal .blend files holding a single export group.
+
+A snapshot contains a scene with only the group's objects and what they
+depend on, so a worker exporting the group loads a file that scales with
+the group instead of the whole shot.
+"""
+import bpy
+
+import btl_blender_exportgroups.data as btldata
+
+SNAPSHOT_SCENE_NAME = "exportgroups_snapshot"
+
+
+def object_pointers(struct):
+    """ Objects referenced by the pointer properties of a modifier,
+    constraint, constraint target or object data.
+    """
+    for prop in struct.bl_rna.properties:
+        if prop.type == "POINTER" and prop.fixed_type.identifier == "Object":
+            obj = getattr(struct, prop.identifier)
+            if obj is not None:
+                yield obj
+
+
+def animation_datas(obj):
+    """ Animation data of the object, its object data and shape keys. """
+    yield obj.animation_data
+    data = obj.data
+    if data is not None:
+        yield getattr(data, "animation_data", None)
+        shape_keys = getattr(data, "shape_keys", None)
+        if shape_keys is not None:
+            yield shape_keys.animation_data
+
+
+def driver_targets(obj):
+    """ Objects read by the drivers of the object, its data and shape keys. """
+    for anim in animation_datas(obj):
+        if anim is None:
+            continue
+        for fcurve in anim.drivers:
+            for variable in fcurve.driver.variables:
+                for target in variable.targets:
+                    if isinstance(target.id, bpy.types.Object):
+                        yield target.id
+
+
+def object_dependencies(objects):
+    """ The objects and every object they depend on: parents, modifier,
+    constraint and driver targets, such as armatures, recursively.
+    """
+    found = set()
+    pending = [o for o in objects if o is not None]
+    while len(pending) > 0:
+        obj = pending.pop()
+        if obj in found:
+            continue
+        found.add(obj)
+
+        if obj.parent is not None:
+            pending.append(obj.parent)
+        for modifier in obj.modifiers:
+            pending.extend(object_pointers(modifier))
+        for constraint in obj.constraints:
+            pending.extend(object_pointers(constraint))
+            for target in getattr(constraint, "targets", []):
+                pending.extend(object_pointers(target))
+        pending.extend(driver_targets(obj))
+    return found
+
+
+def write_snapshot(context, export_group, filepath):
+    """ Write a .blend file whose only scene holds `export_group`,
+    its objects and their dependencies. Data the objects use, such as
+    meshes, materials and actions, is written along with them.
+    """
+    source = context.scene
+    scene = bpy.data.scenes.new(SNAPSHOT_SCENE_NAME)
+    try:
+        scene.frame_start = source.frame_start
+        scene.frame_end = source.frame_end
+        scene.frame_current = source.frame_current
+        scene.render.fps = source.render.fps
+        scene.render.fps_base = source.render.fps_base
+        for k, v in btldata.settings_values(source.alembic_export_options).items():
+            setattr(scene.alembic_export_options, k, v)
+
+        members = btldata.group_objects(export_group)
+        for obj in object_dependencies(members):
+            scene.collection.objects.link(obj)
+
+        group = scene.alembic_export_groups.add()
+        group.name = export_group.name
+        # profiles are not written to the snapshot, the group gets their values
+        for k, v in btldata.group_settings_values(export_group).items():
+            setattr(group.settings, k, v)
+        # rules are resolved here, the snapshot lists the members
+        for obj in members:
+            group.objects.add().object = obj
+
+        # paths relative to the shot would break in the temp directory
+        bpy.data.libraries.write(filepath, {scene}, path_remap="ABSOLUTE")
+    finally:
+        bpy.data.scenes.remove(scene)
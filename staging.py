@@ -0,0 +1,145 @@
+""" Export to a local staging directory and move the files to their
+final paths in background threads.
+
+Alembic writes many small blocks, which is slow on network storage, and
+an interrupted export leaves a truncated archive behind. With a staging
+directory, the exporter writes to local disk; the finished file is then
+copied next to its final path under a temporary name and renamed over
+it, so readers see either the previous file or the complete new one.
+"""
+import concurrent.futures
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+
+import bpy
+
+# Number of files copied at the same time
+copy_threads = 4
+
+_pool = None
+_pending = set()
+# Final path -> future of the latest move to it
+_latest = {}
+# Messages of the moves that failed since the last `clear_failures`
+_failures = []
+_lock = threading.Lock()
+
+
+def staging_dir(scene):
+    """ The scene's absolute staging directory, or "" to export in place. """
+    directory = scene.alembic_export_options.staging_dir
+    return bpy.path.abspath(directory) if directory != "" else ""
+
+
+def staged_path(directory, filepath):
+    """ A new path in the staging directory to export `filepath` to.
+    Every export gets its own, so exporting a file again does not
+    overwrite the staged file of a move still in progress.
+    """
+    # files with the same name in different directories must not collide
+    digest = hashlib.sha1(filepath.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(directory, digest,
+                        "{}_{}".format(uuid.uuid4().hex[:8], os.path.basename(filepath)))
+
+
+def publish(staged, filepath):
+    """ Move a staged file to `filepath`, atomically replacing it. """
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    # the rename is only atomic within a file system, so copy next to the target
+    temppath = "{}.{}.tmp".format(filepath, os.getpid())
+    try:
+        shutil.copyfile(staged, temppath)
+        os.replace(temppath, filepath)
+    except OSError:
+        if os.path.exists(temppath):
+            os.remove(temppath)
+        raise
+    os.remove(staged)
+
+
+def _publish_task(staged, filepath, on_published, previous):
+    if previous is not None:
+        # moves to the same path land in the order of their exports
+        concurrent.futures.wait([previous])
+    try:
+        publish(staged, filepath)
+    except OSError as e:
+        message = "Moving {} to {} failed: {}".format(staged, filepath, e)
+        print(message)
+        with _lock:
+            _failures.append(message)
+        return message
+    if on_published is not None:
+        on_published()
+    return None
+
+
+def _done(future, filepath):
+    with _lock:
+        _pending.discard(future)
+        if _latest.get(filepath) is future:
+            del _latest[filepath]
+
+
+def publish_async(staged, filepath, on_published=None):
+    """ Move a staged file in a background thread, then call `on_published`
+    from that thread. The returned future's result is None, or an error
+    message if the file could not be moved; the staged file is kept then.
+    """
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = concurrent.futures.ThreadPoolExecutor(max_workers=copy_threads)
+        # the pool runs tasks in submission order, so the previous move
+        # to this path has started or finished before this one waits on it
+        future = _pool.submit(_publish_task, staged, filepath, on_published,
+                              _latest.get(filepath))
+        _pending.add(future)
+        _latest[filepath] = future
+    future.add_done_callback(lambda f: _done(f, filepath))
+    return future
+
+
+def when_published(futures, callback):
+    """ Call `callback` once the moves of `futures` are done, if all of
+    them succeeded; from the thread of the last one.
+    """
+    remaining = [len(futures)]
+
+    def done(future):
+        with _lock:
+            remaining[0] -= 1
+            if remaining[0] > 0:
+                return
+        if all(f.exception() is None and f.result() is None for f in futures):
+            callback()
+
+    for future in futures:
+        future.add_done_callback(done)
+
+
+def pending():
+    """ Number of files still being moved. """
+    with _lock:
+        return len(_pending)
+
+
+def failures():
+    """ Messages of the moves that failed since the last `clear_failures`. """
+    with _lock:
+        return list(_failures)
+
+
+def clear_failures():
+    with _lock:
+        _failures.clear()
+
+
+def wait():
+    """ Block until all files are moved. """
+    with _lock:
+        futures = list(_pending)
+    concurrent.futures.wait(futures)
@@ -0,0 +1,106 @@
+""" Timings, sizes and memory use of group exports.
+
+Each exported file yields a stats dict, appended as a JSON line to the
+scene's telemetry log and summarized on its group. Worker processes print
+their stats on a marker line, which the parent process picks up.
+"""
+import cProfile
+import json
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None
+
+import btl_blender_exportgroups.data as btldata
+
+STATS_MARKER = "EXPORTGROUPS_STATS "
+
+
+def peak_rss():
+    """ Peak resident memory of this process in bytes, if known. """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def group_counts(objects):
+    """ Object, vertex and face counts of the (unevaluated) objects. """
+    vertices = 0
+    faces = 0
+    count = 0
+    for obj in objects:
+        if obj is None:
+            continue
+        count += 1
+        if obj.type == "MESH":
+            vertices += len(obj.data.vertices)
+            faces += len(obj.data.polygons)
+    return count, vertices, faces
+
+
+def measure(export_group, values, export, profile=False, own_process=False):
+    """ Run `export()` for a group exported with settings `values`,
+    and return its result with the stats of the export.
+    The peak memory of the process is only that of the export if the
+    process exported nothing else, so it is only reported with `own_process`.
+    """
+    objects, vertices, faces = group_counts(btldata.group_objects(export_group))
+    profiler = cProfile.Profile() if profile else None
+
+    started = time.time()
+    if profiler is not None:
+        result = profiler.runcall(export)
+    else:
+        result = export()
+    wall_time = time.time() - started
+
+    filepath = values["filepath"]
+    if profiler is not None:
+        profiler.dump_stats(filepath + ".prof")
+
+    frames = max(0, values["end"] - values["start"] + 1)
+    size = os.path.getsize(filepath) if os.path.exists(filepath) else None
+    stats = {
+        "group": export_group.name,
+        "filepath": filepath,
+        "timestamp": started,
+        "wall_time": wall_time,
+        "frames": frames,
+        "fps": frames / wall_time if wall_time > 0 else None,
+        "objects": objects,
+        "vertices": vertices,
+        "faces": faces,
+        "size": size,
+        "peak_rss": peak_rss() if own_process else None
+    }
+    return result, stats
+
+
+def print_stats(stats):
+    """ Hand the stats of a worker to the parent process. """
+    print(STATS_MARKER + json.dumps(stats))
+
+
+def parse_stats(lines):
+    """ The stats printed by a worker, if any. """
+    for line in reversed(lines):
+        if line.startswith(STATS_MARKER):
+            return json.loads(line[len(STATS_MARKER):])
+    return None
+
+
+def write_log(filepath, stats_list):
+    """ Append stats as JSON lines. """
+    if len(stats_list) == 0:
+        return
+    os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+    with open(filepath, "a") as f:
+        for stats in stats_list:
+            f.write(json.dumps(stats) + "\n")
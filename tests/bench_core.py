@@ -0,0 +1,81 @@
+""" Micro-benchmarks of the Blender independent core, under plain Python.
+
+    python tests/bench_core.py --groups 1000 --objects 100 --out core.json
+
+Times membership edits, index building, planning and plan checks on
+generated groups; the fastest of `--repeat` runs counts. Results are
+written as JSON, like those of `benchmark.py`, which times the operators
+inside Blender.
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+# makes the package importable without running its __init__
+import conftest  # noqa: F401
+import btl_blender_exportgroups.core as btlcore
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="exportgroups-core-benchmark")
+    parser.add_argument("--groups", type=int, default=1000, help="Number of groups")
+    parser.add_argument("--objects", type=int, default=100, help="Objects per group")
+    parser.add_argument("--shards", type=int, default=4, help="Frame range shards per group")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Runs per benchmark; the fastest one counts")
+    parser.add_argument("--out", help="Write the results to this JSON file")
+    return parser.parse_args(argv)
+
+
+def make_groups(args):
+    """ Groups of `args.objects` objects each; neighbouring groups share
+    half of their objects.
+    """
+    groups = []
+    for i in range(args.groups):
+        first = i * args.objects // 2
+        groups.append(btlcore.Group(
+            "group_{:05d}".format(i),
+            ["object_{:07d}".format(n) for n in range(first, first + args.objects)],
+            {"filepath": os.path.join(os.sep, "out", "group_{:05d}.abc".format(i)),
+             "start": 1,
+             "end": 240,
+             "shards": args.shards}))
+    return groups
+
+
+def run(args):
+    groups = make_groups(args)
+    members = groups[0].members
+    other = groups[1].members
+    units = {g.name: btlcore.group_units(g.values) for g in groups}
+    flat_units = [u for group_units in units.values() for u in group_units]
+
+    benchmarks = {
+        "add_members": lambda: btlcore.added_members(members, other),
+        "remove_members": lambda: btlcore.kept_members(members, other),
+        "build_index": lambda: btlcore.GroupIndex(groups),
+        "plan_units": lambda: [btlcore.group_units(g.values) for g in groups],
+        "check_plan": lambda: btlcore.check_plan(groups, units),
+        "order_units": lambda: btlcore.longest_first(flat_units, lambda u: u["end"] - u["start"]),
+    }
+    results = {"groups": args.groups, "objects": args.objects, "shards": args.shards,
+               "seconds": {}}
+    for name, benchmark in benchmarks.items():
+        results["seconds"][name] = min(timeit.repeat(benchmark, number=1, repeat=args.repeat))
+    return results
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    results = run(args)
+    print(json.dumps(results, indent=1))
+    if args.out is not None:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+""" Make the Blender independent modules importable under plain Python.
+
+The package's `__init__` registers the addon and needs bpy, so it is not
+run: an empty package pointing at the repository stands in for it, and
+modules are imported from there as usual.
+"""
+import os
+import sys
+import types
+
+PACKAGE = "btl_blender_exportgroups"
+
+
+def load_package():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    # pytest imports the repository's __init__ under the directory's name
+    for name in {PACKAGE, os.path.basename(root)}:
+        if name not in sys.modules:
+            package = types.ModuleType(name)
+            package.__path__ = [root]
+            sys.modules[name] = package
+
+
+load_package()
@@ -0,0 +1,105 @@
+import os
+
+import btl_blender_exportgroups.core as btlcore
+import btl_blender_exportgroups.shards as btlshards
+
+
+def make_values(**values):
+    defaults = {"filepath": os.path.join(os.sep, "out", "set.abc"),
+                "start": 1,
+                "end": 100,
+                "shards": 1,
+                "xsamples": 1,
+                "gsamples": 1}
+    defaults.update(values)
+    return defaults
+
+
+def test_added_members_skips_members_and_duplicates():
+    assert btlcore.added_members(["a", "b"], ["b", "c", "c", "d"]) == ["c", "d"]
+
+
+def test_kept_members_keeps_order():
+    assert btlcore.kept_members(["a", "b", "c", "d"], ["d", "b"]) == ["a", "c"]
+
+
+def test_group_index():
+    index = btlcore.GroupIndex([btlcore.Group("chars", ["a", "b"], None),
+                                btlcore.Group("props", ["b"], None),
+                                btlcore.Group("chars", ["c"], None)])
+    assert index.position("chars") == 0
+    assert index.position("props") == 1
+    assert index.position("missing") is None
+    assert index.groups_of("b") == {"chars", "props"}
+    assert index.groups_of("c") == {"chars"}
+    assert index.groups_of("x") == set()
+
+
+def test_operator_args_drops_addon_settings():
+    args = btlcore.operator_args(make_values(split_static=True), ["shards", "split_static"])
+    assert "shards" not in args
+    assert "split_static" not in args
+    assert args["start"] == 1
+
+
+def test_group_units_single_file():
+    values = make_values()
+    assert btlcore.group_units(values) == [{"filepath": values["filepath"]}]
+
+
+def test_group_units_shards_cover_range():
+    units = btlcore.group_units(make_values(shards=3))
+    assert [(u["start"], u["end"]) for u in units] == [(1, 34), (35, 67), (68, 100)]
+    assert units[0]["filepath"] == btlshards.shard_path(make_values()["filepath"], 1, 34)
+
+
+def test_shard_ranges_never_exceed_frames():
+    assert btlshards.shard_ranges(1, 3, 10) == [(1, 1), (2, 2), (3, 3)]
+
+
+def test_split_units():
+    values = make_values(shards=2)
+    units = btlcore.group_units(values)
+    split = btlcore.split_units(values, units, ["rock"], ["tree"])
+    assert len(split) == 3
+    assert all(u["objects"] == ["tree"] and u["selected"] for u in split[:2])
+    assert split[2] == {"filepath": btlcore.static_path(values["filepath"]),
+                        "start": 1,
+                        "end": 1,
+                        "objects": ["rock"],
+                        "selected": True}
+
+
+def test_split_units_all_static_exports_one_frame():
+    values = make_values()
+    split = btlcore.split_units(values, btlcore.group_units(values), ["rock"], [])
+    assert split == [{"filepath": values["filepath"], "start": 1, "end": 1}]
+
+
+def test_split_units_nothing_static():
+    values = make_values()
+    units = btlcore.group_units(values)
+    assert btlcore.split_units(values, units, [], ["tree"]) is units
+
+
+def test_longest_first():
+    assert btlcore.longest_first([3, 10, 1, 7], lambda u: u) == [10, 7, 3, 1]
+
+
+def test_check_values():
+    assert btlcore.check_values("g", make_values()) == []
+    problems = btlcore.check_values("g", make_values(filepath="", start=10, end=5))
+    assert len(problems) == 2
+
+
+def test_check_plan_duplicates():
+    values = make_values()
+    other = make_values(filepath=os.path.join(os.sep, "other.abc"))
+    groups = [btlcore.Group("a", [], values),
+              btlcore.Group("b", [], other),
+              btlcore.Group("b", [], other),
+              btlcore.Group("c", [], values)]
+    units = {g.name: btlcore.group_units(g.values) for g in groups}
+    problems = btlcore.check_plan(groups, units)
+    assert "2 groups are named b" in problems
+    assert any(p.startswith("Groups a, c all export to") for p in problems)
@@ -1,5 +1,165 @@
+import time
+
 import bpy
+import btl_blender_exportgroups.data as btldata
+import btl_blender_exportgroups.index as btlindex
+import btl_blender_exportgroups.jobs as btljobs
 import btl_blender_exportgroups.ops as btlops
+import btl_blender_exportgroups.rules as btlrules
+import btl_blender_exportgroups.staging as btlstaging
+import btl_blender_exportgroups.watch as btlwatch
+
+
+# Number of group objects listed per page
+objects_page_size = 20
+
+# (scene pointer, group name) -> (stamp, positions of the objects matching the filter)
+_filter_cache = {}
+
+
+def frame_range(export_group):
+    """ (start, end) the group is exported with, without reading all of
+    its settings like `data.group_settings_values`.
+    """
+    settings = export_group.settings
+    profile = btldata.group_profile(export_group)
+    return tuple(getattr(profile.settings
+                         if profile is not None and not settings.is_property_set(k)
+                         else settings, k)
+                 for k in ("start", "end"))
+
+
+def group_summary(export_group):
+    """ One line describing a collapsed group. Reads only the frame range
+    of the settings, and the rule's cached objects, so it is not cached itself.
+    """
+    start, end = frame_range(export_group)
+    summary = "{} objects".format(len(export_group.objects))
+    if export_group.rule_type != "NONE":
+        summary += " + {} by rule".format(len(btlrules.rule_objects(export_group)))
+    summary += ", frames {}-{}".format(start, end)
+    if export_group.estimated_time > 0:
+        summary += ", est. {:.1f}s, {:.1f} MB".format(export_group.estimated_time,
+                                                    export_group.estimated_size / 1e6)
+    if export_group.last_export > 0:
+        summary += ", exported {} in {:.1f}s, {:.1f} MB".format(
+            time.strftime("%Y-%m-%d %H:%M", time.localtime(export_group.last_export)),
+            export_group.last_duration,
+            export_group.last_size / 1e6)
+    return summary
+
+
+def filtered_positions(export_group):
+    """ Positions of the group's objects whose name contains the filter
+    text. Cached, as the panel is redrawn on every mouse move.
+    """
+    # membership edits and object renames bump the generations
+    stamp = (export_group.objects_filter,
+             len(export_group.objects),
+             btlindex.generation(),
+             btlrules.generation())
+    key = (export_group.id_data.as_pointer(), export_group.name)
+    cached = _filter_cache.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    text = export_group.objects_filter.lower()
+    positions = [i for i, o in enumerate(export_group.objects)
+                 if o.object is not None and text in o.object.name.lower()]
+    _filter_cache[key] = (stamp, positions)
+    return positions
+
+
+def draw_group_objects(layout, export_group):
+    """ Draw one page of the (filtered) objects of a group. """
+    layout.prop(export_group, "objects_filter", text="", icon="VIEWZOOM")
+
+    if export_group.objects_filter == "":
+        count = len(export_group.objects)
+        filtered = None
+    else:
+        filtered = filtered_positions(export_group)
+        count = len(filtered)
+
+    if count == 0:
+        layout.label(text="No objects in group")
+        return
+
+    pages = (count - 1) // objects_page_size + 1
+    page = min(export_group.objects_page, pages - 1)
+    first = page * objects_page_size
+    last = min(first + objects_page_size, count)
+
+    layout.label(text="Objects {}-{} of {}".format(first + 1, last, count),
+                 icon="OBJECT_DATA")
+    for i in range(first, last):
+        obj = export_group.objects[filtered[i] if filtered is not None else i].object
+        if obj is not None:
+            layout.prop(obj, "name", text="")
+        else:
+            layout.label(text="Missing object", icon="ERROR")
+
+    if pages > 1:
+        layout.prop(export_group, "objects_page",
+                    text="Page (of {})".format(pages))
+
+
+def draw_group_rule(layout, export_group):
+    """ Draw the rule selecting objects for a group. """
+    layout.prop(export_group, "rule_type")
+    if export_group.rule_type == "COLLECTION":
+        layout.prop(export_group, "rule_collection")
+    elif export_group.rule_type in ("NAME_GLOB", "NAME_REGEX"):
+        layout.prop(export_group, "rule_pattern")
+    elif export_group.rule_type == "OBJECT_TYPE":
+        layout.prop(export_group, "rule_object_type")
+
+    if export_group.rule_type != "NONE":
+        error = btlrules.rule_error(export_group)
+        if error is not None:
+            layout.label(text=error, icon="ERROR")
+        else:
+            layout.label(text="{} objects selected by the rule".format(
+                len(btlrules.rule_objects(export_group))))
+
+
+def draw_group_settings(layout, export_group):
+    """ Draw the settings of a group. With a profile, the fields the group
+    does not override show the profile's value, greyed out.
+    """
+    profile = btldata.group_profile(export_group)
+    if profile is None:
+        for propname in btldata.drawn_settings_fields:
+            layout.prop(export_group.settings, propname)
+        return
+
+    for propname in btldata.drawn_settings_fields:
+        row = layout.row(align=True)
+        overridden = export_group.settings.is_property_set(propname)
+        if overridden:
+            row.prop(export_group.settings, propname)
+        else:
+            sub = row.row(align=True)
+            sub.enabled = False
+            sub.prop(profile.settings, propname)
+        op = row.operator("scene.override_group_setting", text="",
+                          icon="LOOP_BACK" if overridden else "GREASEPENCIL")
+        op.group_name = export_group.name
+        op.field = propname
+        op.override = not overridden
+
+
+def draw_job(layout, job):
+    """ Draw the progress of the running export job. """
+    box = layout.box()
+    total = len(job.units)
+    box.label(
+        text="Exporting: {}/{} files ({}%)".format(
+            job.progress, total, 100 * job.progress // max(1, total)),
+        icon="EXPORT")
+    for name, state in job.group_states().items():
+        box.label(text=name, icon=btljobs.state_icons[state])
+    box.label(text="Press Esc to cancel")
 
 
 def menu_func(self, context):
@@ -7,16 +167,27 @@ def menu_func(self, context):
 
 
 class ObjectExportGroupPanel(bpy.types.Panel):
-    """ Panel in which the user can enter a group name to add to. """
+    """ Panel listing the export groups the object belongs to. """
     bl_idname = "OBJECT_PT_export_group"
-    bl_label = "Alembic export group"
+    bl_label = "Alembic export groups"
     bl_space_type = "PROPERTIES"
     bl_region_type = "WINDOW"
     bl_context = "object"
 
     def draw(self, context):
-        if context.object is not None:
-            self.layout.prop(context.object, "export_group")
+        if context.object is None:
+            return
+
+        group_names = btlindex.groups_of(context.scene, context.object)
+        if len(group_names) > 0:
+            for name in sorted(group_names):
+                self.layout.label(text=name, icon="GROUP")
+        else:
+            self.layout.label(text="Not in any export group")
+
+        self.layout.operator(
+            btlops.AddSelectedToExportGroupOperator.bl_idname,
+            icon="ADD")
 
 
 class SceneExportGroupPanel(bpy.types.UIList):
@@ -35,13 +206,14 @@ class SceneExportGroupPanel(bpy.types.UIList):
         col = row.column()
         col.prop(item, "group_selected")
 
-        if item.expanded:
+        if not item.expanded:
+            box.label(text=group_summary(item))
+        else:
             box_settings = box.box()
             box_settings.label(text="Export settings", icon="SETTINGS")
-            for propname in [k
-                             for k in item.settings.__annotations__.keys()
-                             if k not in ["expanded", "group_selected"]]:
-                box_settings.prop(item.settings, propname)
+            box_settings.prop_search(item, "profile",
+                                     context.scene, "alembic_export_profiles")
+            draw_group_settings(box_settings, item)
 
             # add ops
             row = box.row()
@@ -55,13 +227,8 @@ class SceneExportGroupPanel(bpy.types.UIList):
             op_select = col.operator("scene.select_export_group_objects", icon="SELECT_SET")
             op_select.group_name = item.name
 
-            box_objects = box.box()
-            if len(item.objects) > 0:
-                box_objects.label(text="Objects", icon="OBJECT_DATA")
-                for obj in item.objects:
-                    box_objects.prop(obj.object, "name")
-            else:
-                box_objects.label(text="No objects in group")
+            draw_group_rule(box.box(), item)
+            draw_group_objects(box.box(), item)
 
 
 class SceneExportGroupsPanel(bpy.types.Panel):
@@ -82,18 +249,60 @@ class SceneExportGroupsPanel(bpy.types.Panel):
             context.scene,
             "alembic_export_index")
 
+        options = context.scene.alembic_export_options
+        self.layout.prop(options, "workers")
+        if options.workers > 0:
+            self.layout.prop(options, "use_snapshots")
+        self.layout.prop(options, "staging_dir")
+        moving = btlstaging.pending()
+        if moving > 0:
+            self.layout.label(text="Moving {} files to their paths".format(moving),
+                              icon="FILE_REFRESH")
+        failures = btlstaging.failures()
+        if len(failures) > 0:
+            self.layout.label(text="Moving {} files failed, last: {}".format(
+                len(failures), failures[-1]), icon="ERROR")
+        self.layout.prop(options, "telemetry_log")
+        self.layout.prop(options, "profile")
+        row = self.layout.row(align=True)
+        row.prop(options, "watch", icon="HIDE_OFF")
+        sub = row.row(align=True)
+        sub.enabled = options.watch
+        sub.prop(options, "watch_delay", text="Delay")
+        dirty = btlwatch.dirty_groups(context.scene)
+        if options.watch and options.workers == 0:
+            self.layout.label(text="Watch mode needs worker processes", icon="ERROR")
+        elif options.watch and len(dirty) > 0:
+            self.layout.label(text="{} groups waiting to export".format(len(dirty)),
+                              icon="TIME")
+        if btljobs.current_job is not None:
+            draw_job(self.layout, btljobs.current_job)
+
         self.layout.operator(
             "scene.create_export_group",
             text=btlops.CreateExportGroupOperator.bl_label,
             icon="ADD")
-        self.layout.operator(
+        row = self.layout.row(align=True)
+        row.operator(
             "scene.export_groups",
             text=btlops.ExportGroupsOperator.bl_label,
             icon="EXPORT")
-        self.layout.operator(
+        row.operator(
+            "scene.export_groups",
+            text="",
+            icon="FILE_REFRESH").force = True
+        row = self.layout.row(align=True)
+        row.operator(
             "scene.export_selected_groups",
             text=btlops.ExportSelectedGroupsOperator.bl_label,
             icon="EXPORT")
+        row.operator(
+            "scene.export_selected_groups",
+            text="",
+            icon="FILE_REFRESH").force = True
+        self.layout.operator(
+            "scene.estimate_export_costs",
+            icon="TIME")
         self.layout.operator(
             "scene.set_selected_groups_range",
             text=btlops.SetSelectedGroupsRangeFromSceneOperator.bl_label,
@@ -101,3 +310,52 @@ class SceneExportGroupsPanel(bpy.types.Panel):
         self.layout.operator(
             "scene.delete_selected_export_groups",
             icon="TRASH")
+        self.layout.operator(
+            "scene.apply_settings_to_selected_groups",
+            icon="COPYDOWN")
+        self.layout.operator(
+            "scene.assign_profile_to_selected_groups",
+            icon="PRESET")
+        row = self.layout.row(align=True)
+        row.operator("scene.export_group_definitions", icon="FILE_TICK")
+        row.operator("scene.import_group_definitions", icon="FILEBROWSER")
+
+
+class SceneExportProfilesList(bpy.types.UIList):
+    """ List of the scene's settings profiles.
+    """
+    bl_idname = "SCENE_UL_export_profiles"
+
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index, flt_flag):
+        layout.prop(item, "name", text="", emboss=False, icon="PRESET")
+
+
+class SceneExportProfilesPanel(bpy.types.Panel):
+    """ Panel with the settings profiles, and the settings of the active one.
+    """
+    bl_label = "Alembic export settings profiles"
+    bl_idname = "SCENE_PT_export_profiles"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "Alembic export group settings"
+    bl_options = {"DEFAULT_CLOSED"}
+
+    def draw(self, context):
+        row = self.layout.row()
+        row.template_list(
+            "SCENE_UL_export_profiles",
+            "",
+            context.scene,
+            "alembic_export_profiles",
+            context.scene,
+            "alembic_export_profile_index")
+        col = row.column(align=True)
+        col.operator("scene.create_export_profile", text="", icon="ADD")
+        col.operator("scene.delete_export_profile", text="", icon="REMOVE")
+
+        profiles = context.scene.alembic_export_profiles
+        index = context.scene.alembic_export_profile_index
+        if 0 <= index < len(profiles):
+            box = self.layout.box()
+            for propname in btldata.drawn_settings_fields:
+                box.prop(profiles[index].settings, propname)
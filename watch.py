@@ -0,0 +1,206 @@
+""" Watch mode: re-export groups shortly after their objects change.
+
+A depsgraph handler marks the groups whose member objects were moved or
+reshaped as dirty. Once the scene has been quiet for the watch delay, a
+timer exports the dirty groups in an export job it advances itself.
+Edits made while that job runs mark groups dirty again and are exported
+by the next job, so a burst of edits costs at most one export per group.
+Watch mode only exports with worker processes: exporting in this process
+would freeze Blender and take over the selection while the artist works.
+"""
+import time
+
+import bpy
+from bpy.app.handlers import persistent
+
+import btl_blender_exportgroups.export as btlexport
+import btl_blender_exportgroups.index as btlindex
+import btl_blender_exportgroups.jobs as btljobs
+import btl_blender_exportgroups.rules as btlrules
+import btl_blender_exportgroups.workers as btlworkers
+
+# Seconds between steps of a watch job, and between checks of a busy queue
+step_interval = 0.1
+busy_interval = 0.5
+
+# Scene name -> names of its dirty groups
+_dirty = {}
+_last_change = 0.0
+# The job started by the timer, if any
+_job = None
+# Set while the timer exports, the updates this causes are not edits
+_exporting = False
+
+
+def is_active(scene):
+    """ True if watch mode is on and can run for the scene. """
+    options = scene.alembic_export_options
+    return options.watch and options.workers > 0
+
+
+def dirty_groups(scene):
+    """ Names of the scene's groups waiting to be exported. """
+    return _dirty.get(scene.name, set())
+
+
+def clear(scene=None):
+    """ Forget the dirty groups of `scene`, or of all scenes. """
+    if scene is None:
+        _dirty.clear()
+    else:
+        _dirty.pop(scene.name, None)
+
+
+def changed_groups(scene, objects):
+    """ Names of the groups of `scene` that contain any of `objects`,
+    as explicit members or through their rule.
+    """
+    names = set()
+    for obj in objects:
+        names |= btlindex.groups_of(scene, obj)
+
+    pointers = set(obj.as_pointer() for obj in objects)
+    for export_group in scene.alembic_export_groups:
+        if export_group.rule_type == "NONE" or export_group.name in names:
+            continue
+        if not pointers.isdisjoint(btlrules.rule_pointers(export_group)):
+            names.add(export_group.name)
+    return names
+
+
+def mark_dirty(scene, names):
+    global _last_change
+    if len(names) == 0:
+        return
+    _dirty.setdefault(scene.name, set()).update(names)
+    _last_change = time.monotonic()
+    if not bpy.app.timers.is_registered(_on_timer):
+        bpy.app.timers.register(_on_timer,
+                                first_interval=scene.alembic_export_options.watch_delay)
+
+
+@persistent
+def _on_depsgraph_update(scene, depsgraph=None):
+    if _exporting or not is_active(scene):
+        return
+    if depsgraph is None:
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+
+    objects = [update.id.original for update in depsgraph.updates
+               if isinstance(update.id, bpy.types.Object) and
+               (update.is_updated_transform or update.is_updated_geometry)]
+    if len(objects) > 0:
+        mark_dirty(scene, changed_groups(scene, objects))
+
+
+def _start_job(context, scene):
+    """ Start a job exporting the dirty groups of `scene`. """
+    global _job
+    names = _dirty.pop(scene.name, set())
+    groups = [g for g in scene.alembic_export_groups if g.name in names]
+    report = btlexport.ExportReport()
+    # unchanged groups, e.g. after an edit was undone, are skipped
+    units = btlexport.plan_export(context, groups, report)
+    if len(report.errors) > 0 or len(units) == 0:
+        for message in report.errors:
+            print("Watch mode: {}".format(message))
+        return
+
+    print("Watch mode: exporting {}".format(", ".join(sorted(names))))
+    _job = btljobs.ExportJob(context, units, report,
+                             scene.alembic_export_options.workers)
+    btljobs.current_job = _job
+
+
+def _finish_job(context):
+    global _job
+    job = _job
+    try:
+        job.finish(context)
+    finally:
+        btljobs.current_job = None
+        _job = None
+    for message in job.report.errors:
+        print("Watch mode: {}".format(message))
+    for result in job.report.failed:
+        print("Watch mode: exporting group {} failed: {}".format(result.group,
+                                                                 result.message))
+
+
+def _tag_redraw():
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == "VIEW_3D":
+                area.tag_redraw()
+
+
+def _on_timer():
+    global _exporting
+    context = bpy.context
+    scene = context.scene
+
+    if _job is not None:
+        _exporting = True
+        try:
+            _job.step(context)
+            if _job.finished:
+                _finish_job(context)
+        except Exception as e:
+            # a stuck job would block every later export
+            print("Watch mode: export job failed: {}".format(e))
+            _drop_job()
+        finally:
+            _exporting = False
+        _tag_redraw()
+        return step_interval
+
+    if not is_active(scene):
+        clear(scene)
+        return None
+    if len(dirty_groups(scene)) == 0:
+        return None
+
+    quiet = time.monotonic() - _last_change
+    delay = scene.alembic_export_options.watch_delay
+    if quiet < delay:
+        return delay - quiet
+    if btljobs.current_job is not None:
+        # an export started from the panel is running, wait for it
+        return busy_interval
+
+    _start_job(context, scene)
+    _tag_redraw()
+    return step_interval
+
+
+def _drop_job():
+    """ Cancel the timer's job without recording anything. """
+    global _job
+    if _job is None:
+        return
+    _job.cancel()
+    if _job.tempdir is not None:
+        btlworkers.remove_blendfiles(_job.tempdir)
+    btljobs.current_job = None
+    _job = None
+
+
+@persistent
+def _on_load_post(*args):
+    # the groups and the job belong to the previous file
+    clear()
+    _drop_job()
+
+
+def register():
+    bpy.app.handlers.depsgraph_update_post.append(_on_depsgraph_update)
+    bpy.app.handlers.load_post.append(_on_load_post)
+
+
+def unregister():
+    bpy.app.handlers.depsgraph_update_post.remove(_on_depsgraph_update)
+    bpy.app.handlers.load_post.remove(_on_load_post)
+    if bpy.app.timers.is_registered(_on_timer):
+        bpy.app.timers.unregister(_on_timer)
+    _drop_job()
+    clear()
@@ -0,0 +1,177 @@
+""" Export groups in parallel with a pool of background Blender processes.
+
+The current file is saved to a temporary copy, or every group to its own
+snapshot file, and every export unit (a group name plus settings
+overrides) is handed to its own `blender -b` process running `worker_main`.
+"""
+import argparse
+import collections
+import concurrent.futures
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import bpy
+
+import btl_blender_exportgroups.data as btldata
+import btl_blender_exportgroups.index as btlindex
+import btl_blender_exportgroups.snapshot as btlsnapshot
+import btl_blender_exportgroups.telemetry as btltelemetry
+
+ADDON_NAME = "btl_blender_exportgroups"
+
+WORKER_EXPR = "import {}.workers as w; w.worker_main()".format(ADDON_NAME)
+
+# `stats` are the telemetry of the export, see telemetry.measure
+ExportResult = collections.namedtuple("ExportResult",
+                                      ["group", "filepath", "ok", "message", "stats"],
+                                      defaults=(None,))
+
+
+def prepare_blendfiles(context, group_names):
+    """ Write the files workers export the groups from, to a fresh
+    temporary directory: a copy of the current file, or a snapshot per
+    group if the scene's export options ask for it.
+    Returns the directory and a dict of group names to files.
+    """
+    tempdir = tempfile.mkdtemp(prefix="exportgroups_")
+    if not context.scene.alembic_export_options.use_snapshots:
+        filepath = os.path.join(tempdir, "scene.blend")
+        # the open file is left untouched
+        bpy.ops.wm.save_as_mainfile(filepath=filepath, copy=True)
+        return tempdir, {name: filepath for name in group_names}
+
+    blendfiles = {}
+    for i, name in enumerate(sorted(set(group_names))):
+        filepath = os.path.join(tempdir, "group_{}.blend".format(i))
+        btlsnapshot.write_snapshot(context, btlindex.find_group(context.scene, name),
+                                   filepath)
+        blendfiles[name] = filepath
+    return tempdir, blendfiles
+
+
+def remove_blendfiles(tempdir):
+    shutil.rmtree(tempdir, ignore_errors=True)
+
+
+def worker_command(blendfile, group_name, overrides):
+    return [bpy.app.binary_path,
+            "-b", blendfile,
+            # without it, Blender exits with 0 when the script raises
+            "--python-exit-code", "1",
+            "--python-expr", WORKER_EXPR,
+            "--",
+            "--group", group_name,
+            "--overrides", json.dumps(overrides)]
+
+
+class Worker:
+    """ A running export process; its output goes to a temporary file,
+    so it can be polled without reading from a pipe.
+    """
+
+    def __init__(self, blendfile, group_name, overrides):
+        self.group_name = group_name
+        self.filepath = overrides.get("filepath", "")
+        self.log = tempfile.TemporaryFile(mode="w+")
+        self.proc = subprocess.Popen(worker_command(blendfile, group_name, overrides),
+                                     stdout=self.log,
+                                     stderr=subprocess.STDOUT,
+                                     universal_newlines=True)
+
+    def done(self):
+        return self.proc.poll() is not None
+
+    def terminate(self):
+        self.proc.terminate()
+        self.proc.wait()
+        self.log.close()
+
+    def result(self):
+        """ Wait for the process and return its ExportResult. """
+        returncode = self.proc.wait()
+        self.log.seek(0)
+        lines = self.log.read().strip().splitlines()
+        self.log.close()
+        stats = btltelemetry.parse_stats(lines)
+        # a worker that exported prints its stats; exiting with 0 alone
+        # may be a crash that never got to the export
+        if returncode == 0 and stats is not None:
+            return ExportResult(self.group_name, self.filepath, True, "", stats)
+        return ExportResult(self.group_name, self.filepath, False,
+                            "\n".join(lines[-5:]), stats)
+
+
+def run_worker(blendfile, group_name, overrides):
+    """ Run a single export in a background process and wait for it. """
+    return Worker(blendfile, group_name, overrides).result()
+
+
+def export_parallel(context, units, workers):
+    """ Export (group name, overrides) units with at most `workers` processes.
+    Returns one ExportResult per unit, in the order of `units`.
+    """
+    tempdir, blendfiles = prepare_blendfiles(context, [name for name, _ in units])
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(run_worker, blendfiles[name], name, overrides)
+                       for name, overrides in units]
+            results = []
+            for (name, overrides), future in zip(units, futures):
+                try:
+                    results.append(future.result())
+                except OSError as e:
+                    results.append(ExportResult(
+                        name, overrides.get("filepath", ""), False, str(e)))
+            return results
+    finally:
+        remove_blendfiles(tempdir)
+
+
+def ensure_registered():
+    """ Enable the addon in background processes that did not load it. """
+    if not hasattr(bpy.types.Scene, "alembic_export_groups"):
+        import addon_utils
+        addon_utils.enable(ADDON_NAME, default_set=False)
+
+
+def script_args():
+    """ Command line arguments after `--`, which Blender leaves alone. """
+    return sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+
+
+def worker_main():
+    """ Entry point of a worker process, see `worker_command`. """
+    import btl_blender_exportgroups.export as btlexport
+
+    parser = argparse.ArgumentParser(prog="exportgroups-worker")
+    parser.add_argument("--group", required=True)
+    parser.add_argument("--overrides", default="{}")
+    args = parser.parse_args(script_args())
+    ensure_registered()
+
+    context = bpy.context
+    found_group = btlindex.find_group(context.scene, args.group)
+    if found_group is None:
+        print("Export group {} not found".format(args.group))
+        sys.exit(1)
+
+    overrides = json.loads(args.overrides)
+    values = btldata.group_settings_values(found_group)
+    values.update(overrides)
+    try:
+        result, stats = btltelemetry.measure(
+            found_group,
+            values,
+            lambda: btlexport.do_export_group(found_group, context, **overrides),
+            profile=context.scene.alembic_export_options.profile,
+            own_process=True)
+        btltelemetry.print_stats(stats)
+    except Exception as e:
+        print("Exporting group {} failed: {}".format(args.group, e))
+        sys.exit(1)
+
+    sys.exit(0 if "FINISHED" in result else 1)